@@ -5,6 +5,7 @@
 # Зависимости сервера:
 #   server.py  — основной процесс (TCP/UDP SFU)
 #   config.py  — константы, структуры UDP-заголовка (struct, os, sys)
+#   net_utils.py — настройка UDP-сокетов и привязка потоков, общая с клиентом
 #   Всё остальное — stdlib (socket, threading, json, time, struct)
 
 import os
@@ -23,9 +24,11 @@ a = Analysis(
         # автоматически как импортируемый модуль, но явно указываем
         # для надёжности (он не является пакетом, а обычным .py)
         (os.path.join(base_path, 'config.py'), '.'),
+        (os.path.join(base_path, 'net_utils.py'), '.'),
     ],
     hiddenimports=[
         'config',   # server.py делает: from config import *
+        'net_utils',
         'struct',
         'json',
         'threading',
@@ -6,7 +6,6 @@ import numpy as np
 import sounddevice as sd
 import opuslib
 import heapq
-import struct
 import time
 # ── Встроенная замена scipy.signal (butter / sosfilt / sosfilt_zi) ─────────────
 # Причина: scipy.signal при импорте транзитивно подтягивает scipy.stats, которая
@@ -118,7 +117,7 @@ def sosfilt_zi(sos: np.ndarray) -> np.ndarray:
         scale  *= K                                    # выход → вход следующей секции
 
     return zi
-from PyQt6.QtCore import QObject, pyqtSignal, QSettings
+from PyQt6.QtCore import QObject, pyqtSignal, QSettings, QTimer
 from config import *
 
 # ---------------------------------------------------------------------------
@@ -131,6 +130,14 @@ from config import *
 _WLP_SOS     = butter(4, 1200, btype='low', fs=48000, output='sos')
 _ANON_LP_SOS = butter(4, 4000, btype='low', fs=48000, output='sos')
 
+# Множитель int16 → float32 как numpy-скаляр float32: np.multiply(..., out=f32)
+# не продвигает результат в float64 и пишет прямо в предаллоцированный буфер.
+_I16_TO_F32 = np.float32(1.0 / 32767.0)
+
+# Числитель N-speaker headroom gain: sqrt(2) / sqrt(N). Константа модуля —
+# не пересчитываем math.sqrt(2.0) в каждом вызове audio_callback.
+_SQRT2 = math.sqrt(2.0)
+
 try:
     from pyrnnoise import RNNoise
 
@@ -655,8 +662,8 @@ class StreamAudioCapture:
 
                     self._sequence += 1
                     flags = FLAG_STREAM_AUDIO | FLAG_LOOPBACK_AUDIO
-                    # Используем прекомпилированный struct вместо struct.pack('!IdIB', ...)
-                    packet = UDP_HEADER_STRUCT.pack(uid, time.time(), self._sequence, flags) + encoded
+                    # Используем прекомпилированный UDP_HEADER_PACK вместо struct.pack('!IdIB', ...)
+                    packet = UDP_HEADER_PACK(uid, time.time(), self._sequence, flags) + encoded
                     self.send_queue.put_nowait(packet)
 
         except Exception as e:
@@ -825,8 +832,17 @@ class AudioHandler(QObject):
             except Exception as e:
                 print(f"[Audio] Ошибка RNNoise: {e}")
 
-        self.incoming_packets = queue.Queue(maxsize=500)
-        self.incoming_stream_packets = queue.Queue(maxsize=500)
+        # Входящие пакеты: deque(maxlen) вместо queue.Queue.
+        # queue.Queue берёт mutex + condition variable на каждый put/get, а при
+        # переполнении put_nowait бросал исключение, которое глоталось (дроп
+        # НОВОГО пакета). deque.append / popleft GIL-атомарны, без локов;
+        # при переполнении deque сам вытесняет САМЫЙ СТАРЫЙ пакет — для
+        # голоса актуальный фрейм важнее давно стоящего в очереди.
+        # Event будит обработчик без поллинга, когда приходят новые пакеты.
+        self.incoming_packets = deque(maxlen=500)
+        self.incoming_stream_packets = deque(maxlen=500)
+        self._incoming_event = threading.Event()
+        self._incoming_stream_event = threading.Event()
         self.send_queue = queue.Queue(maxsize=100)
 
         # --- Стрим-аудио ---
@@ -850,6 +866,13 @@ class AudioHandler(QObject):
         self._is_deafened = threading.Event()
 
         self.mix_buffer = np.zeros(CHUNK_SIZE, dtype=np.float32)
+        # Рабочий буфер для декодированного PCM (int16 → float32).
+        # Раньше на каждого говорящего в каждом фрейме создавались два временных
+        # массива: .astype(np.float32) и результат деления на 32767.
+        # Теперь конвертация идёт одним проходом np.multiply(..., out=...) в этот
+        # буфер. Безопасно переиспользовать между пользователями: s полностью
+        # потребляется (+= в mix_buffer) до декодирования следующего пакета.
+        self._decode_f32 = np.empty(CHUNK_SIZE, dtype=np.float32)
         saved_vad_slider = int(self.global_settings.value("vad_threshold_slider", 5))
         self.vad_threshold = saved_vad_slider / 1000.0
         self.vad_hangover = 0.4
@@ -914,6 +937,31 @@ class AudioHandler(QObject):
         # Счётчик воспроизведённых loopback-кадров (для периодического лога).
         # Инициализируем здесь чтобы убрать hasattr() из audio_callback hot path.
         self._lb_play_counter = 0
+        # print() из audio_callback захватывает GIL и lock stdout — при нескольких
+        # loopback-стримерах или потерях пакетов это давало непредсказуемые
+        # задержки реалтайм-потока. Теперь callback только выставляет значения,
+        # а печатает _flush_audio_log по QTimer в UI-потоке (AudioHandler
+        # создаётся в MainWindow, поэтому таймер живёт в главном потоке).
+        #   _lb_log_pending      — громкость стрима для лога или None
+        #   _stream_decode_errors — число ошибок декодирования с прошлого сброса
+        #   _stream_decode_last_err — текст последней ошибки
+        self._lb_log_pending: float | None = None
+        self._stream_decode_errors = 0
+        self._stream_decode_last_err = ""
+        self._log_timer = QTimer(self)
+        self._log_timer.setInterval(2000)
+        self._log_timer.timeout.connect(self._flush_audio_log)
+        self._log_timer.start()
+        # Отложенная запись громкостей в QSettings. Ползунок громкости шлёт
+        # set_user_volume на каждый шаг, а setValue() мог уходить на диск
+        # прямо под users_lock (его же ждёт _packet_processor_loop). Теперь
+        # пишем в словарь, а в QSettings сбрасываем одним пакетом через 500 мс
+        # после последнего изменения (UI-поток, singleShot-дебаунс).
+        self._pending_settings: dict = {}
+        self._settings_timer = QTimer(self)
+        self._settings_timer.setSingleShot(True)
+        self._settings_timer.setInterval(500)
+        self._settings_timer.timeout.connect(self._flush_pending_settings)
         # Ссылки на рабочие потоки — нужны для корректного join() в stop().
         # Без явного join() повторные вызовы start() (переподключение, смена
         # устройства) накапливают «зомби»-потоки: каждый поток висит в памяти
@@ -940,6 +988,11 @@ class AudioHandler(QObject):
         # -------------------------------------------------------------------
         self._audio_users_snapshot: dict = {}
         self._audio_stream_users_snapshot: dict = {}
+        # Те же снимки в виде tuple((uid, RemoteUser), ...) — публикуются
+        # вместе с dict. audio_callback итерирует кортеж: снимок неизменяем,
+        # и проверка «dict changed size during iteration» на каждом шаге не нужна.
+        self._audio_users_snapshot_items: tuple = ()
+        self._audio_stream_users_snapshot_items: tuple = ()
 
     def set_bitrate(self, bitrate_kbps):
         bitrate_bps = int(bitrate_kbps) * 1000
@@ -1027,6 +1080,8 @@ class AudioHandler(QObject):
             if t is not None and t.is_alive():
                 t.join(timeout=0.5)
             setattr(self, attr, None)
+        # Не теряем громкости, изменённые менее 500 мс назад
+        self._flush_pending_settings()
         if hasattr(self, 'stream') and self.stream:
             try:
                 self.stream.stop()
@@ -1051,6 +1106,7 @@ class AudioHandler(QObject):
 
             # FIX #1: обновляем COW-снимок после удаления пользователей
             self._audio_users_snapshot = dict(self.remote_users)
+            self._audio_users_snapshot_items = tuple(self._audio_users_snapshot.items())
 
         # stream_remote_users — под отдельным локом (не блокировать audio_callback)
         with self.stream_users_lock:
@@ -1060,11 +1116,34 @@ class AudioHandler(QObject):
                     del self.stream_remote_users[uid]
             # FIX #1: обновляем COW-снимок после удаления
             self._audio_stream_users_snapshot = dict(self.stream_remote_users)
+            self._audio_stream_users_snapshot_items = tuple(self._audio_stream_users_snapshot.items())
+
+    @staticmethod
+    def _pop_packet(packets: deque, event: threading.Event):
+        """
+        Забирает самый старый пакет из deque или ждёт новый до 0.1 сек.
+        Возвращает None если пакетов нет (вызывающий цикл проверит _is_running).
+
+        Event сбрасываем ДО повторной проверки deque: если производитель
+        успел добавить пакет между неудачным popleft() и clear(), мы увидим
+        его при повторной проверке, а не заснём на 100 мс.
+        """
+        try:
+            return packets.popleft()
+        except IndexError:
+            event.clear()
+            if not packets:
+                event.wait(0.1)
+            return None
 
     def _packet_processor_loop(self):
+        packets = self.incoming_packets
+        event = self._incoming_event
         while self._is_running.is_set():
             try:
-                packet_data = self.incoming_packets.get(timeout=0.1)
+                packet_data = self._pop_packet(packets, event)
+                if packet_data is None:
+                    continue
                 uid, seq, data, flags = packet_data
                 if uid == self.my_uid: continue
 
@@ -1080,6 +1159,17 @@ class AudioHandler(QObject):
                         self.remote_users[uid].volume = val
                         self.remote_users[uid].volume_zero = (val == 0.0)
 
+                        # FIX #1: обновляем COW-снимок внутри лока — согласованное состояние.
+                        # dict() копирует только ссылки (не RemoteUser объекты) — это быстро.
+                        # audio_callback читает снимок без лока, опираясь на GIL-атомарность
+                        # присваивания ссылки.
+                        # Пересобираем только при изменении состава (новый uid здесь,
+                        # удаление — в cleanup_users). Раньше снимок копировался на
+                        # каждый пакет (~50/с на собеседника), хотя RemoteUser-объекты
+                        # в нём общие с remote_users и поля видны callback'у и так.
+                        self._audio_users_snapshot = dict(self.remote_users)
+                        self._audio_users_snapshot_items = tuple(self._audio_users_snapshot.items())
+
                     user = self.remote_users[uid]
                     user.remote_muted = bool(flags & 1)
                     user.remote_deafened = bool(flags & 2)
@@ -1088,14 +1178,6 @@ class AudioHandler(QObject):
                         user.jitter_buffer.add(seq, data)
                         user.last_packet_time = time.time()
 
-                    # FIX #1: обновляем COW-снимок внутри лока — согласованное состояние.
-                    # dict() копирует только ссылки (не RemoteUser объекты) — это быстро.
-                    # audio_callback читает снимок без лока, опираясь на GIL-атомарность
-                    # присваивания ссылки.
-                    self._audio_users_snapshot = dict(self.remote_users)
-
-            except queue.Empty:
-                continue
             except Exception:
                 pass
 
@@ -1117,9 +1199,13 @@ class AudioHandler(QObject):
            • uid in remote_users    → отбрасываем (уже слышим в той же комнате — не дублируем)
            • иначе                  → воспроизводим (стример из другой комнаты)
         """
+        packets = self.incoming_stream_packets
+        event = self._incoming_stream_event
         while self._is_running.is_set():
             try:
-                packet_data = self.incoming_stream_packets.get(timeout=0.1)
+                packet_data = self._pop_packet(packets, event)
+                if packet_data is None:
+                    continue
                 uid, seq, data, flags = packet_data
 
                 is_loopback = bool(flags & FLAG_LOOPBACK_AUDIO)
@@ -1140,12 +1226,13 @@ class AudioHandler(QObject):
                         if storage_uid not in self.stream_remote_users:
                             self.stream_remote_users[storage_uid] = RemoteUser(storage_uid)
                             print(f"[AudioHandler] Создан буфер для системного звука (storage_uid={storage_uid})")
+                            # FIX #1: COW-снимок для audio_callback (только при смене состава)
+                            self._audio_stream_users_snapshot = dict(self.stream_remote_users)
+                            self._audio_stream_users_snapshot_items = tuple(self._audio_stream_users_snapshot.items())
                         user = self.stream_remote_users[storage_uid]
                         if data:
                             user.jitter_buffer.add(seq, data)
                             user.last_packet_time = time.time()
-                        # FIX #1: COW-снимок для audio_callback
-                        self._audio_stream_users_snapshot = dict(self.stream_remote_users)
                 else:
                     # --- Микрофон стримера ---
                     if uid == self.my_uid:
@@ -1184,19 +1271,18 @@ class AudioHandler(QObject):
                     with self.stream_users_lock:
                         if uid not in self.stream_remote_users:
                             self.stream_remote_users[uid] = RemoteUser(uid)
+                            # FIX #1: COW-снимок для audio_callback (только при смене состава)
+                            self._audio_stream_users_snapshot = dict(self.stream_remote_users)
+                            self._audio_stream_users_snapshot_items = tuple(self._audio_stream_users_snapshot.items())
                         user = self.stream_remote_users[uid]
                         if data:
                             user.jitter_buffer.add(seq, data)
                             user.last_packet_time = time.time()
-                        # FIX #1: COW-снимок для audio_callback
-                        self._audio_stream_users_snapshot = dict(self.stream_remote_users)
 
-            except queue.Empty:
-                continue
             except Exception:
                 pass
 
-    def audio_callback(self, indata, outdata, frames, time_info, status):
+    def audio_callback(self, indata, outdata, frames, time_info, status, _sqrt=math.sqrt):
         # Логируем только первый вызов — подтверждает что callback запустился
         if not getattr(self, '_cb_first_logged', False):
             self._cb_first_logged = True
@@ -1273,12 +1359,12 @@ class AudioHandler(QObject):
                     # _whisper_sequence, так что разрыва seq при возврате не будет.
                     self._whisper_sequence += 1
                     w_flags = FLAG_WHISPER
-                    w_header = UDP_HEADER_STRUCT.pack(self.my_uid, curr_time,
-                                           self._whisper_sequence, w_flags)
-                    # Payload: [target_uid: 4 байта] + [opus]
-                    w_payload = struct.pack('!I', whisper_uid) + encoded
+                    # [header][target_uid: 4 байта] одним pack + [opus]
+                    w_packet = UDP_HEADER_UID_PACK(self.my_uid, curr_time,
+                                                   self._whisper_sequence, w_flags,
+                                                   whisper_uid) + encoded
                     try:
-                        self.send_queue.put_nowait(w_header + w_payload)
+                        self.send_queue.put_nowait(w_packet)
                     except Exception:
                         pass
 
@@ -1287,7 +1373,7 @@ class AudioHandler(QObject):
                     pcm_to_encode = (denoised_float * 32767).astype(np.int16).tobytes()
                     encoded = self.encoder.encode(pcm_to_encode, CHUNK_SIZE)
                     self.my_sequence += 1
-                    packet = UDP_HEADER_STRUCT.pack(self.my_uid, curr_time, self.my_sequence, flags) + encoded
+                    packet = UDP_HEADER_PACK(self.my_uid, curr_time, self.my_sequence, flags) + encoded
 
                     if not self.was_talking:
                         # FIX #3: deque.popleft() — O(1) вместо list.pop(0) — O(n)
@@ -1303,8 +1389,8 @@ class AudioHandler(QObject):
                     # Сервер направит его только зрителям, а не в комнату (нет дублирования)
                     if self._stream_audio_sending.is_set():
                         stream_flags = flags | FLAG_STREAM_AUDIO
-                        stream_packet = UDP_HEADER_STRUCT.pack(self.my_uid, curr_time,
-                                                    self.my_sequence, stream_flags) + encoded
+                        stream_packet = UDP_HEADER_PACK(self.my_uid, curr_time,
+                                                        self.my_sequence, stream_flags) + encoded
                         try:
                             self.send_queue.put_nowait(stream_packet)
                         except:
@@ -1315,14 +1401,20 @@ class AudioHandler(QObject):
                     # пополняем pre_buffer для следующего старта речи.
                     self.was_talking = False
                     if not is_talking and whisper_uid == 0:
-                        empty_packet = UDP_HEADER_STRUCT.pack(self.my_uid, curr_time, 0, flags)
+                        empty_packet = UDP_HEADER_PACK(self.my_uid, curr_time, 0, flags)
                         # FIX #3: deque(maxlen=5) — автоматически вытесняет старые
                         # элементы при переполнении, ручная проверка len > 5 не нужна.
                         self.vad_pre_buffer.append(empty_packet)
             except:
                 pass
 
-        self.mix_buffer.fill(0)
+        # Рендерим прямо в буфер PortAudio: поток открыт с dtype='float32'
+        # и CHANNELS=1 → outdata имеет форму (frames, 1), а reshape(-1) даёт
+        # view без копирования. Итоговое outdata[:] = mix_buffer (ещё одна
+        # полная копия фрейма) больше не нужно. mix_buffer остаётся запасным
+        # аккумулятором, если формат вывода когда-нибудь станет многоканальным.
+        mix = outdata.reshape(-1) if CHANNELS == 1 else self.mix_buffer
+        mix.fill(0)
         if not self._is_deafened.is_set():
             # ── N-speaker headroom ────────────────────────────────────────────
             # Проблема: 3+ участников говорят одновременно → сумма амплитуд
@@ -1338,103 +1430,109 @@ class AudioHandler(QObject):
             # Считаем «активных»: last_packet < 1.5с AND не заглушен AND volume > 0.
             # Не блокируемся — читаем уже готовый COW-снимок без лока.
             _n_active = sum(
-                1 for u in self._audio_users_snapshot.values()
+                1 for _, u in self._audio_users_snapshot_items
                 if (curr_time - u.last_packet_time < 1.5
                     and not u.is_locally_muted
                     and not u.volume_zero)
             )
             # Включаем стрим-пользователей в подсчёт (они тоже добавляются в mix)
             _n_active += sum(
-                1 for u in self._audio_stream_users_snapshot.values()
+                1 for _, u in self._audio_stream_users_snapshot_items
                 if curr_time - u.last_packet_time < 1.5
             )
             # gain: при 1–2 спикерах = 1.0 (без изменений),
             # при 3+ — плавно снижается, сохраняя суммарную громкость.
             # Не меняем gain агрессивно: берём max(2, N) чтобы 2 человека
             # никогда не получали ослабления.
-            _speaker_gain = math.sqrt(2.0) / math.sqrt(max(2, _n_active))
+            # _sqrt — default-аргумент (LOAD_FAST) вместо LOAD_GLOBAL math + LOAD_ATTR.
+            _speaker_gain = _SQRT2 / _sqrt(max(2, _n_active))
+            # Коэффициенты усиления держим в float32: скаляр float32 × массив
+            # float32 гарантированно остаётся float32 независимо от правил
+            # приведения версии numpy, а умножение делаем на месте в scratch-
+            # буфере — без временного массива на каждого говорящего.
+            _speaker_gain = np.float32(_speaker_gain)
+
+            # ── Шёпот: отсев устаревших шептунов (раз за фрейм, не per-user) ────
+            # _active_whispers[uid] обновляется в add_incoming_whisper_packet
+            # на каждый входящий пакет шёпота (~50 раз/сек). Шептун неактивен
+            # (≥ 2 с без пакетов) → освобождаем state (нет утечки памяти).
+            # В обычном режиме словарь пуст — стоимость одна проверка truthiness.
+            _whisperers = self._active_whispers
+            if _whisperers:
+                for _w_uid, _w_ts in list(_whisperers.items()):
+                    if curr_time - _w_ts >= 2.0:
+                        _whisperers.pop(_w_uid, None)
+                        self._whisper_states.pop(_w_uid, None)
+            _deferred_whispers = None
 
             # FIX #1: читаем COW-снимок БЕЗ лока.
             # _packet_processor_loop обновляет _audio_users_snapshot внутри
             # users_lock после каждого изменения. Снимок «отстаёт» максимум
             # на 1 пакет (~20 мс) — для аудиомикширования незаметно.
             # JitterBuffer.get() имеет собственный внутренний лок — thread-safe.
-            for uid, user in self._audio_users_snapshot.items():
+            #
+            # Фаза 1 — быстрый путь: обычные собеседники без эффекта шёпота.
+            # Шептуны откладываются во вторую фазу, чтобы тяжёлая ветка
+            # pitch-shifter'а не сидела внутри горячего цикла.
+            for uid, user in self._audio_users_snapshot_items:
                 if curr_time - user.last_packet_time < 1.5:
                     data = user.jitter_buffer.get()
                     if data and not user.is_locally_muted and not user.volume_zero:
+                        if _whisperers and uid in _whisperers:
+                            if _deferred_whispers is None:
+                                _deferred_whispers = []
+                            _deferred_whispers.append((uid, user, data))
+                            continue
                         try:
                             decoded = user.decoder.decode(data, CHUNK_SIZE)
-                            s = np.frombuffer(decoded, dtype=np.int16).astype(np.float32) / 32767.0
-
-                            # ── Per-uid whisper effect ───────────────────────────────────
-                            # _active_whispers[uid] обновляется в add_incoming_whisper_packet
-                            # на каждый входящий пакет шёпота (~50 раз/сек).
-                            #
-                            # «Тёплый старт» при первом пакете (uid не в _whisper_states):
-                            # history заполняем текущим фреймом s (повторённым до 2048).
-                            # Обе читающие головки pitch-shifter'а сразу попадают в реальный
-                            # сигнал — переход ноль→сигнал отсутствует → нет треска/click.
-                            #
-                            # LP-фильтр: нулевые начальные условия оптимальны для голосового
-                            # сигнала (mean ≈ 0); sosfilt_zi(sos)*0 == zeros.
-                            #
-                            # Два шептуна одновременно: каждый uid имеет свой state dict →
-                            # независимые history/phase/lp_zi/buf → нет взаимных артефактов →
-                            # оба смешиваются в mix_buffer без потерь.
-                            _w_ts = self._active_whispers.get(uid, 0.0)
-                            if _w_ts and (curr_time - _w_ts) < 2.0:
-                                if uid not in self._whisper_states:
-                                    # Ленивое создание: тёплый старт с реальным сигналом
-                                    _warm_history = np.resize(
-                                        s.astype(np.float32), 2048).copy()
-                                    self._whisper_states[uid] = {
-                                        'history': _warm_history,
-                                        'phase':   0.0,
-                                        'lp_zi':   np.zeros(
-                                            (self._anon_lp_sos.shape[0], 2),
-                                            dtype=np.float64),
-                                        'buf':     np.zeros(
-                                            2048 + CHUNK_SIZE, dtype=np.float32),
-                                    }
-                                s = self._apply_anonymous_voice_effect(
-                                    s, self._whisper_states[uid])
-                            else:
-                                # Шептун неактивен: освобождаем state (нет утечки памяти)
-                                self._active_whispers.pop(uid, None)
-                                self._whisper_states.pop(uid, None)
-
-                            self.mix_buffer += s * (user.volume * _speaker_gain)
-
-                            # ── Mix Minus для зрителей (FLAG_STREAM_VOICES) ───────────────
-                            # Стример ретранслирует голос каждого собеседника зрителям
-                            # с пометкой speaker_uid. Зритель на своей стороне отбросит
-                            # пакет, если speaker_uid == его собственный uid (Mix Minus
-                            # без DSP). Это устраняет эхо даже если AEC не справился.
-                            #
-                            # Payload: [speaker_uid: 4 байта big-endian] + [opus-данные].
-                            # Флаги: FLAG_STREAM_AUDIO | FLAG_STREAM_VOICES.
-                            # Сервер маршрутизирует такие пакеты только зрителям стримера.
-                            #
-                            # FIX Bug #2: каждый голос получает свой уникальный seq через
-                            # self._sv_sequence — иначе все спикеры одного кадра имели
-                            # одинаковый seq и JitterBuffer на приёмной стороне отбрасывал
-                            # все пакеты кроме первого (seq <= last_seq → return).
-                            if self._stream_audio_sending.is_set():
-                                try:
-                                    self._sv_sequence += 1
-                                    sv_flags = (FLAG_STREAM_AUDIO | FLAG_STREAM_VOICES)
-                                    # header: uid стримера (отправитель), ts, seq, flags
-                                    sv_header = UDP_HEADER_STRUCT.pack(self.my_uid, curr_time,
-                                                            self._sv_sequence, sv_flags)
-                                    # payload: speaker_uid (чей голос) + opus
-                                    sv_payload = struct.pack('!I', uid) + data
-                                    self.send_queue.put_nowait(sv_header + sv_payload)
-                                except Exception:
-                                    pass
+                            src = np.frombuffer(decoded, dtype=np.int16)
+                            s = self._decode_f32[:len(src)]
+                            np.multiply(src, _I16_TO_F32, out=s, casting='unsafe')
+                            s *= np.float32(user.volume) * _speaker_gain
+                            mix += s
+                            self._send_stream_voice(uid, data, curr_time)
                         except:
                             pass
 
+            # Фаза 2 — шептуны (обычно 0, редко 1 за фрейм).
+            #
+            # «Тёплый старт» при первом пакете (uid не в _whisper_states):
+            # history заполняем текущим фреймом s (повторённым до 2048).
+            # Обе читающие головки pitch-shifter'а сразу попадают в реальный
+            # сигнал — переход ноль→сигнал отсутствует → нет треска/click.
+            #
+            # LP-фильтр: нулевые начальные условия оптимальны для голосового
+            # сигнала (mean ≈ 0); sosfilt_zi(sos)*0 == zeros.
+            #
+            # Два шептуна одновременно: каждый uid имеет свой state dict →
+            # независимые history/phase/lp_zi/buf → нет взаимных артефактов →
+            # оба смешиваются в mix_buffer без потерь.
+            if _deferred_whispers:
+                for uid, user, data in _deferred_whispers:
+                    try:
+                        decoded = user.decoder.decode(data, CHUNK_SIZE)
+                        src = np.frombuffer(decoded, dtype=np.int16)
+                        s = self._decode_f32[:len(src)]
+                        np.multiply(src, _I16_TO_F32, out=s, casting='unsafe')
+                        state = self._whisper_states.get(uid)
+                        if state is None:
+                            # Ленивое создание: тёплый старт с реальным сигналом
+                            state = {
+                                'history': np.resize(s, 2048).astype(np.float32),
+                                'phase':   0.0,
+                                'lp_zi':   np.zeros(
+                                    (self._anon_lp_sos.shape[0], 2),
+                                    dtype=np.float64),
+                                'buf':     np.zeros(
+                                    2048 + CHUNK_SIZE, dtype=np.float32),
+                            }
+                            self._whisper_states[uid] = state
+                        s = self._apply_anonymous_voice_effect(s, state)
+                        mix += s * (np.float32(user.volume) * _speaker_gain)
+                        self._send_stream_voice(uid, data, curr_time)
+                    except:
+                        pass
+
             # ── Стрим-аудио: игровой звук от стримера (зрительская сторона) ─────────
             # Микшируем ВНУТРИ deafen-проверки: если зритель нажал «заглушить всё»,
             # стрим тоже должен замолчать.
@@ -1444,21 +1542,24 @@ class AudioHandler(QObject):
             # С WASAPI Loopback (fallback): AEC применён внутри StreamAudioCapture._audio_cb.
             sv = self.stream_volume   # float, чтение атомарно (GIL-safe)
             # FIX #1: читаем COW-снимок БЕЗ лока — аналогично блоку remote_users выше.
-            for s_uid, user in self._audio_stream_users_snapshot.items():
+            for s_uid, user in self._audio_stream_users_snapshot_items:
                 if curr_time - user.last_packet_time < 1.5:
                     data = user.jitter_buffer.get()
                     if data:
                         try:
                             decoded = user.decoder.decode(data, CHUNK_SIZE)
-                            s = np.frombuffer(decoded, dtype=np.int16).astype(np.float32) / 32767.0
-                            self.mix_buffer += s * sv * _speaker_gain
+                            src = np.frombuffer(decoded, dtype=np.int16)
+                            s = self._decode_f32[:len(src)]
+                            np.multiply(src, _I16_TO_F32, out=s, casting='unsafe')
+                            s *= np.float32(sv) * _speaker_gain
+                            mix += s
                             if s_uid >= LOOPBACK_UID_OFFSET:
                                 self._lb_play_counter += 1
                                 if self._lb_play_counter % 100 == 0:
-                                    print(f"[Audio-Output] Стрим-звук воспроизводится "
-                                          f"(громкость: {sv:.2f})")
+                                    self._lb_log_pending = sv
                         except Exception as e:
-                            print(f"[Audio-Output] Ошибка декодирования стрим-аудио: {e}")
+                            self._stream_decode_errors += 1
+                            self._stream_decode_last_err = str(e)
 
         # FIX: Soft limiter вместо жёсткого clip.
         # Жёсткий clip при пиках > 1.0 (2-3 говорящих + stream audio) создаёт
@@ -1466,18 +1567,79 @@ class AudioHandler(QObject):
         # Решение: если пик > 0.95 — нормализуем весь буфер пропорционально.
         # Это аналог look-ahead limiter без attack/release (приемлемо для 20 мс фреймов).
         # np.clip остаётся как safety net для float-погрешностей.
-        _peak = np.max(np.abs(self.mix_buffer))
+        _peak = np.max(np.abs(mix))
         if _peak > 0.95:
-            self.mix_buffer *= (0.95 / _peak)
-        np.clip(self.mix_buffer, -1.0, 1.0, out=self.mix_buffer)
+            mix *= (0.95 / _peak)
+        np.clip(mix, -1.0, 1.0, out=mix)
+
+        if mix is self.mix_buffer:
+            outdata[:] = mix.reshape(-1, 1)
 
-        outdata[:] = self.mix_buffer.reshape(-1, 1)
+    def _send_stream_voice(self, uid: int, data: bytes, curr_time: float):
+        """
+        Mix Minus для зрителей (FLAG_STREAM_VOICES).
+
+        Стример ретранслирует голос каждого собеседника зрителям
+        с пометкой speaker_uid. Зритель на своей стороне отбросит
+        пакет, если speaker_uid == его собственный uid (Mix Minus
+        без DSP). Это устраняет эхо даже если AEC не справился.
+
+        Payload: [speaker_uid: 4 байта big-endian] + [opus-данные].
+        Флаги: FLAG_STREAM_AUDIO | FLAG_STREAM_VOICES.
+        Сервер маршрутизирует такие пакеты только зрителям стримера.
+
+        FIX Bug #2: каждый голос получает свой уникальный seq через
+        self._sv_sequence — иначе все спикеры одного кадра имели
+        одинаковый seq и JitterBuffer на приёмной стороне отбрасывал
+        все пакеты кроме первого (seq <= last_seq → return).
+        """
+        if not self._stream_audio_sending.is_set():
+            return
+        try:
+            self._sv_sequence += 1
+            sv_flags = (FLAG_STREAM_AUDIO | FLAG_STREAM_VOICES)
+            # header: uid стримера (отправитель), ts, seq, flags
+            # + speaker_uid (чей голос) — одним pack, затем opus
+            sv_packet = UDP_HEADER_UID_PACK(self.my_uid, curr_time,
+                                            self._sv_sequence, sv_flags, uid) + data
+            self.send_queue.put_nowait(sv_packet)
+        except Exception:
+            pass
+
+    def _flush_audio_log(self):
+        """
+        Печатает отложенные сообщения audio_callback (UI-поток, раз в 2 сек).
+        Чтения/записи простых атрибутов GIL-атомарны — лок не нужен.
+        """
+        sv = self._lb_log_pending
+        if sv is not None:
+            self._lb_log_pending = None
+            print(f"[Audio-Output] Стрим-звук воспроизводится (громкость: {sv:.2f})")
+        errors = self._stream_decode_errors
+        if errors:
+            self._stream_decode_errors = 0
+            print(f"[Audio-Output] Ошибка декодирования стрим-аудио "
+                  f"(×{errors}): {self._stream_decode_last_err}")
+
+    def _flush_pending_settings(self):
+        """Сбрасывает накопленные громкости в QSettings (UI-поток, вне users_lock)."""
+        pending, self._pending_settings = self._pending_settings, {}
+        for key, value in pending.items():
+            self.settings.setValue(key, value)
+
+    def _get_volume_setting(self, key):
+        # Ещё не сброшенное значение приоритетнее того, что лежит в QSettings
+        if key in self._pending_settings:
+            return self._pending_settings[key]
+        return self.settings.value(key, None)
 
     def register_ip_mapping(self, uid, ip_addr):
         if not ip_addr: return
+        # Чтение QSettings — до захвата лока: users_lock держим только на
+        # время обновления словарей.
+        saved_vol = self._get_volume_setting(f"vol_ip_{ip_addr}")
         with self.users_lock:
             self.uid_to_ip[uid] = ip_addr
-            saved_vol = self.settings.value(f"vol_ip_{ip_addr}", None)
             if saved_vol is not None:
                 saved_vol = float(saved_vol)
                 if uid in self.remote_users:
@@ -1500,10 +1662,14 @@ class AudioHandler(QObject):
                 if user.volume_zero != prev_zero:
                     emit_zero_state = user.volume_zero
                 ip = self.uid_to_ip.get(uid)
-                if ip:
-                    self.settings.setValue(f"vol_ip_{ip}", vol)
-                else:
-                    self.settings.setValue(f"volume_{uid}", vol)
+                settings_key = f"vol_ip_{ip}" if ip else f"volume_{uid}"
+            else:
+                settings_key = None
+
+        # QSettings пишем ВНЕ лока и с дебаунсом — см. _flush_pending_settings
+        if settings_key is not None:
+            self._pending_settings[settings_key] = vol
+            self._settings_timer.start()
 
         # Эмитируем сигнал ВНЕ лока — не блокируем аудиопоток
         if emit_zero_state is not None:
@@ -1552,10 +1718,15 @@ class AudioHandler(QObject):
         self.whisper_target_uid = 0
 
     def add_incoming_packet(self, uid, seq, data, flags=0):
-        try:
-            self.incoming_packets.put_nowait((uid, seq, data, flags))
-        except:
-            pass
+        """
+        Входящий голосовой пакет. data должен быть собственным bytes: пакет
+        лежит в очереди до декодирования, а NetworkClient принимает датаграммы
+        в переиспользуемый буфер (recv_into/recvmmsg) — memoryview на него
+        перезапишется следующим пакетом.
+        """
+        # deque(maxlen) при переполнении сам вытесняет самый старый пакет
+        self.incoming_packets.append((uid, seq, data, flags))
+        self._incoming_event.set()
 
     def add_incoming_whisper_packet(self, uid, seq, data):
         """
@@ -1596,11 +1767,12 @@ class AudioHandler(QObject):
         self.add_incoming_packet(uid, seq, data, 0)
 
     def add_incoming_stream_packet(self, uid, seq, data, flags=0):
-        """Входящий пакет стрим-аудио (FLAG_STREAM_AUDIO) от сервера."""
-        try:
-            self.incoming_stream_packets.put_nowait((uid, seq, data, flags))
-        except:
-            pass
+        """
+        Входящий пакет стрим-аудио (FLAG_STREAM_AUDIO) от сервера.
+        data — собственный bytes, не memoryview на буфер приёма (см. add_incoming_packet).
+        """
+        self.incoming_stream_packets.append((uid, seq, data, flags))
+        self._incoming_stream_event.set()
 
     def set_stream_audio_enabled(self, enabled: bool):
         """Включить/выключить передачу микрофона и системного звука стримером зрителям."""
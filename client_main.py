@@ -1,38 +1,54 @@
 import os
 import json
+import errno
+import time
 import ctypes
 import sys
 import socket
 import traceback
+import threading
 import faulthandler
+from contextlib import contextmanager
 
 # ── CRASH DIAGNOSTICS ────────────────────────────────────────────────────────
 # faulthandler пишет нативный C-стектрейс при SIGSEGV / STATUS_STACK_BUFFER_OVERRUN
 # прямо в файл — даже если Python уже не работает.
 _crash_log = open("crash_native.log", "w", buffering=1)
 faulthandler.enable(file=_crash_log)
+# Лог Python-исключений держим открытым так же, как crash_native.log —
+# без open()/close() на каждое исключение (line-buffered: строка сразу на диске).
+_crash_python_log = open("crash_python.log", "a", encoding="utf-8", buffering=1)
+# Несколько потоков могут упасть одновременно — лок не даёт трейсбекам перемешаться.
+_crash_log_lock = threading.Lock()
 
 # Глобальный перехват необработанных Python-исключений → в файл + консоль
 def _global_excepthook(exc_type, exc_value, exc_tb):
     msg = "".join(traceback.format_exception(exc_type, exc_value, exc_tb))
     print(f"[CRASH] Необработанное исключение:\n{msg}", flush=True)
-    with open("crash_python.log", "a", encoding="utf-8") as f:
-        f.write(msg)
+    with _crash_log_lock:
+        _crash_python_log.write(msg)
     sys.__excepthook__(exc_type, exc_value, exc_tb)
 
 sys.excepthook = _global_excepthook
 print("[DEBUG] faulthandler активирован → crash_native.log", flush=True)
 
-def resource_path(relative_path):
-    """ Получает абсолютный путь к ресурсам, работает для dev и для PyInstaller """
-    try:
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path)
+# resource_path — единая кэшированная реализация из config (config не тянет
+# нативных библиотек, поэтому его можно импортировать до настройки DLL).
+from config import resource_path
 
 # ── Добавляем папку проекта в поиск DLL (opus.dll, rnnoise.dll) ──────────────
 # Делаем это ДО любых импортов, которые грузят нативные библиотеки.
+#
+# SetDefaultDllDirectories(LOAD_LIBRARY_SEARCH_DEFAULT_DIRS) ограничивает поиск
+# DLL папкой приложения, System32 и каталогами add_dll_directory — без обхода
+# всех записей PATH на каждый LoadLibrary. DLL_LOAD_DIR (0x100) сюда передавать
+# нельзя: функция принимает только флаги DEFAULT/APPLICATION/SYSTEM32/USER_DIRS.
+_LOAD_LIBRARY_SEARCH_DEFAULT_DIRS = 0x00001000
+try:
+    ctypes.windll.kernel32.SetDefaultDllDirectories(_LOAD_LIBRARY_SEARCH_DEFAULT_DIRS)
+except Exception:
+    pass
+
 _project_dir = os.path.dirname(os.path.abspath(__file__))
 os.add_dll_directory(_project_dir)
 try:
@@ -40,6 +56,19 @@ try:
 except Exception:
     pass
 
+# ── Предзагрузка opus.dll / rnnoise.dll по полному пути ──────────────────────
+# Загрузчик Windows ищет уже загруженный модуль по имени, поэтому последующие
+# ctypes.CDLL("opus.dll") в opuslib / rnnoise получают готовый хэндл без обхода
+# каталогов поиска. Хэндлы держим в _PINNED_DLLS, чтобы GC не выгрузил их.
+_PINNED_DLLS = []
+for _dll_name in ("opus.dll", "rnnoise.dll"):
+    for _dll_path in (resource_path(_dll_name), os.path.join(_project_dir, _dll_name)):
+        try:
+            _PINNED_DLLS.append(ctypes.WinDLL(_dll_path))
+            break
+        except (OSError, AttributeError):
+            pass
+
 # Сообщаем системе, что мы поддерживаем DPI (High DPI Aware)
 try:
     ctypes.windll.shcore.SetProcessDpiAwareness(1)
@@ -52,13 +81,14 @@ except Exception:
 from PyQt6.QtWidgets import (QApplication, QWidget, QVBoxLayout, QHBoxLayout,
                              QLineEdit, QPushButton, QLabel, QCheckBox, QFrame,
                              QSizePolicy, QProgressBar)
-from PyQt6.QtCore import Qt, QTimer, QThread, pyqtSignal, QObject
-from PyQt6.QtGui import QIcon, QSurfaceFormat, QPixmap
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QObject, QSocketNotifier
+from PyQt6.QtGui import QIcon, QSurfaceFormat, QPixmap, QPixmapCache
 
-from config import resource_path, DEFAULT_PORT_TCP
-from ui_main import MainWindow
-from ui_dialogs import AvatarSelector
-from updater import check_for_updates_async, download_and_install
+from config import DEFAULT_PORT_TCP, ASSETS, json_loads
+from version import APP_NAME, APP_VERSION
+# ui_main / ui_dialogs / updater импортируются лениво — в методах, где они
+# нужны. Их граф зависимостей (аудио, сеть, видео, HTTP) не должен грузиться
+# до появления первого окна.
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -66,50 +96,236 @@ from updater import check_for_updates_async, download_and_install
 # ══════════════════════════════════════════════════════════════════════════════
 CONFIG_FILE       = "user_config.json"
 PROBE_TIMEOUT_SEC = 3.0
+# Если GitHub уже подтвердил, что текущая версия последняя, менее 6 часов
+# назад — при старте не ходим за обновлениями повторно (экономим 1–2 сек).
+UPDATE_CHECK_TTL_SEC = 6 * 60 * 60
+# Коды connect_ex() для «соединение устанавливается» (Linux / Windows)
+_CONNECT_IN_PROGRESS = {errno.EINPROGRESS, errno.EWOULDBLOCK, 10035}  # 10035 = WSAEWOULDBLOCK
+# Картинка «сервер недоступен»: ищется в нескольких стандартных местах.
+# Путь разрешаем один раз при импорте — ретраи больше не делают до 6 stat().
+_FAIL_IMAGE_CANDIDATES = (
+    "assets/fail_connect.svg",
+    "assets/fail_connect.png",
+    "assets/icon/fail_connect.svg",
+    "assets/icon/fail_connect.png",
+    "assets/images/fail_connect.svg",
+    "assets/images/fail_connect.png",
+)
+_FAIL_ASSET = next(
+    (p for p in map(resource_path, _FAIL_IMAGE_CANDIDATES) if os.path.exists(p)),
+    None,
+)
+_LOGO_ASSET = ASSETS.ICON_LOGO if os.path.exists(ASSETS.ICON_LOGO) else None
 
 
 # ══════════════════════════════════════════════════════════════════════════════
 # Вспомогательные функции
 # ══════════════════════════════════════════════════════════════════════════════
+# path → ((st_mtime_ns, st_size), разобранный конфиг)
+_CFG_CACHE: dict[str, tuple[tuple[int, int], dict | None]] = {}
+
+
 def load_config() -> dict | None:
-    if os.path.exists(CONFIG_FILE):
+    # load_config вызывается при старте, в _start_probe и перед каждой записью.
+    # Разбор JSON повторяем только если файл изменился (mtime_ns + размер);
+    # иначе отдаём копию закэшированного dict — вызывающие его мутируют.
+    try:
+        st = os.stat(CONFIG_FILE)
+    except OSError:
+        _CFG_CACHE.pop(CONFIG_FILE, None)
+        return None
+    stamp = (st.st_mtime_ns, st.st_size)
+    cached = _CFG_CACHE.get(CONFIG_FILE)
+    if cached is not None and cached[0] == stamp:
+        cfg = cached[1]
+    else:
+        # Оба декодера принимают bytes (UTF-8) напрямую.
+        # Битый JSON (ValueError) = «конфига нет» → форма входа.
         try:
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
-            pass
-    return None
+            with open(CONFIG_FILE, 'rb') as f:
+                cfg = json_loads(f.read())
+        except (OSError, ValueError):
+            cfg = None
+        _CFG_CACHE[CONFIG_FILE] = (stamp, cfg)
+    return dict(cfg) if isinstance(cfg, dict) else cfg
+
+
+def _write_config(cfg: dict) -> None:
+    # Пишем во временный файл и атомарно подменяем: если процесс упадёт
+    # посреди записи, старый user_config.json останется целым.
+    data = json.dumps(cfg, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    tmp = CONFIG_FILE + ".tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, CONFIG_FILE)
+    except Exception as e:
+        print(f"[Config] Не удалось сохранить конфиг: {e}")
 
 
 def save_config(ip: str, nick: str, avatar: str) -> None:
+    # Сохраняем служебные поля (last_check_ts / latest_version) из прежнего конфига
+    cfg = load_config() or {}
+    cfg.update({"ip": ip, "nick": nick, "avatar": avatar})
+    _write_config(cfg)
+
+
+def update_check_is_fresh(cfg: dict | None) -> bool:
+    """True — недавняя проверка уже показала, что текущая версия последняя."""
+    if not cfg:
+        return False
     try:
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
-            json.dump({"ip": ip, "nick": nick, "avatar": avatar}, f)
-    except Exception as e:
-        print(f"[Config] Не удалось сохранить конфиг: {e}")
+        age = time.time() - float(cfg.get("last_check_ts", 0))
+    except (TypeError, ValueError):
+        return False
+    return 0 <= age < UPDATE_CHECK_TTL_SEC and cfg.get("latest_version") == APP_VERSION
+
+
+def remember_update_check(latest_version: str) -> None:
+    """
+    Запоминает время успешной проверки обновлений. Пишем только в уже
+    существующий конфиг: если пользователь не сохранял данные входа, файл
+    с одними служебными полями включил бы авто-коннект по умолчанию.
+    """
+    cfg = load_config()
+    if not cfg:
+        return
+    cfg["last_check_ts"] = time.time()
+    cfg["latest_version"] = latest_version
+    _write_config(cfg)
+
+
+def _cached_pixmap(key: str, factory) -> QPixmap:
+    """
+    Достаёт QPixmap из глобального QPixmapCache или создаёт через factory()
+    и кладёт туда. Qt сам вытесняет давно неиспользуемые картинки при
+    превышении лимита кэша (по умолчанию 10 МБ — для наших ассетов с запасом).
+    """
+    px = QPixmapCache.find(key)
+    if px is None:
+        px = factory()
+        QPixmapCache.insert(key, px)
+    return px
+
+
+def _cached_scaled_pixmap(path: str, w: int, h: int) -> QPixmap:
+    """
+    Картинка из файла, вписанная в w×h — через кэш.
+
+    .ico / .svg берём через QIcon.pixmap(): для .ico он выбирает ближайший
+    по размеру встроенный кадр, SVG растеризует сразу в нужном размере —
+    билинейный ресэмплинг не нужен. Растровые PNG масштабируем
+    FastTransformation: коэффициент у наших ассетов меньше 2×.
+    """
+    def _load():
+        if path.lower().endswith((".ico", ".svg")):
+            return QIcon(path).pixmap(w, h)
+        return QPixmap(path).scaled(
+            w, h,
+            Qt.AspectRatioMode.KeepAspectRatio,
+            Qt.TransformationMode.FastTransformation,
+        )
+    return _cached_pixmap(f"{path}:{w}x{h}", _load)
+
+
+@contextmanager
+def _batched_updates(widget: QWidget):
+    """
+    Отключает перерисовку widget на время серии setText/setStyleSheet/show/hide —
+    Qt выполнит одну перерисовку по выходу вместо отдельной на каждый вызов.
+    Вложенные блоки (например, _start_probe → _do_tcp_probe) не включают
+    обновления раньше внешнего.
+    """
+    if not widget.updatesEnabled():
+        yield
+        return
+    widget.setUpdatesEnabled(False)
+    try:
+        yield
+    finally:
+        widget.setUpdatesEnabled(True)
 
 
 # ══════════════════════════════════════════════════════════════════════════════
-# Фоновый поток: TCP probe
+# TCP probe (в UI-потоке, через event loop Qt)
 # ══════════════════════════════════════════════════════════════════════════════
-class ConnectWorker(QThread):
+class TcpProbe(QObject):
+    """
+    Проверка доступности сервера без отдельного потока.
+
+    Раньше на каждую попытку создавался QThread ради одного connect(),
+    а повторный probe ждал quit()/wait(500) предыдущего. Теперь сокет
+    неблокирующий: connect_ex() сразу возвращает «в процессе», а о
+    завершении сообщает QSocketNotifier(Write) — и при успехе, и при
+    отказе (ECONNREFUSED / RST); результат читаем из SO_ERROR.
+    Таймаут PROBE_TIMEOUT_SEC — обычный singleShot QTimer.
+
+    В форме входа вводится IP — для него connect_ex() не делает DNS-запроса.
+    Имя хоста резолвится синхронно (getaddrinfo) прямо в UI-потоке.
+    """
     result = pyqtSignal(bool)
 
-    def __init__(self, ip: str):
-        super().__init__()
+    def __init__(self, ip: str, parent: QObject | None = None):
+        super().__init__(parent)
         self.ip = ip
+        self._sock: socket.socket | None = None
+        self._notifier: QSocketNotifier | None = None
+        self._done = False
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(lambda: self._finish(False))
+
+    def start(self):
+        try:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            self._sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._sock.setblocking(False)
+            err = self._sock.connect_ex((self.ip, DEFAULT_PORT_TCP))
+        except Exception:
+            self._finish(False)
+            return
+
+        if err == 0:
+            self._finish(True)
+        elif err in _CONNECT_IN_PROGRESS:
+            self._notifier = QSocketNotifier(
+                self._sock.fileno(), QSocketNotifier.Type.Write, self)
+            self._notifier.activated.connect(self._on_writable)
+            self._timer.start(int(PROBE_TIMEOUT_SEC * 1000))
+        else:
+            self._finish(False)
+
+    def cancel(self):
+        """Прерывает незавершённый probe без испускания result."""
+        self._finish(None)
 
-    def run(self):
-        ok = False
+    def _on_writable(self):
         try:
-            s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            s.settimeout(PROBE_TIMEOUT_SEC)
-            s.connect((self.ip, DEFAULT_PORT_TCP))
-            s.close()
-            ok = True
+            ok = self._sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR) == 0
         except Exception:
-            pass
-        self.result.emit(ok)
+            ok = False
+        self._finish(ok)
+
+    def _finish(self, ok: bool | None):
+        # Таймаут и notifier могут сработать в одном тике — результат отдаём один раз
+        if self._done:
+            return
+        self._done = True
+        self._timer.stop()
+        if self._notifier is not None:
+            self._notifier.setEnabled(False)
+            self._notifier.deleteLater()
+            self._notifier = None
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except Exception:
+                pass
+            self._sock = None
+        if ok is not None:
+            self.result.emit(ok)
 
 
 # ══════════════════════════════════════════════════════════════════════════════
@@ -238,6 +454,38 @@ _BTN_SKIP_SS = (
     "}"
 )
 
+_BTN_AVATAR_SS = """
+    QPushButton {
+        background-color: rgba(91,142,245,0.16);
+        color: #8ab0f5;
+        border: 1px solid rgba(91,142,245,0.40);
+        border-radius: 6px;
+        font-size: 13px;
+        padding: 5px 14px;
+    }
+    QPushButton:hover {
+        background-color: rgba(91,142,245,0.28);
+        border-color: rgba(91,142,245,0.70);
+        color: #ffffff;
+    }
+"""
+
+# Стили статусной строки ConnectingScreen — одни и те же объекты-строки
+# переиспользуются при каждой смене состояния (без новых литералов).
+_STATUS_SS_BASE   = "font-size: 17px; font-weight: bold; background: transparent; border: none; color: "
+_STATUS_SS_NORMAL = _STATUS_SS_BASE + "#cdd6f4;"
+_STATUS_SS_UPDATE = _STATUS_SS_BASE + "#c39ef5;"
+_STATUS_SS_OK     = _STATUS_SS_BASE + "#82e0aa;"
+_STATUS_SS_ERROR  = _STATUS_SS_BASE + "#ff8080;"
+
+_SEPARATOR_SS     = "background: rgba(255,255,255,0.08); border: none;"
+_ERROR_LABEL_SS   = ("color: #ff8080; font-size: 13px; font-weight: 500; "
+                     "background: transparent; border: none;")
+_FIELD_LABEL_SS   = ("font-size: 12px; font-weight: bold; color: #8899bb; "
+                     "background: transparent; border: none;")
+_ADDRESS_LABEL_SS = ("color: rgba(200,210,224,0.55); font-size: 13px; "
+                     "background: transparent; border: none;")
+_EMOJI_IMAGE_SS   = "font-size: 72px;"
 
 class _AppTitleBar(QWidget):
     """
@@ -278,7 +526,8 @@ class _AppTitleBar(QWidget):
         ico = QLabel()
         ico.setFixedSize(18, 18)
         try:
-            ico.setPixmap(QIcon(resource_path("assets/icon/logo.ico")).pixmap(18, 18))
+            # Иконка приложения уже загружена (app.setWindowIcon) — без чтения .ico
+            ico.setPixmap(QApplication.windowIcon().pixmap(18, 18))
         except Exception:
             pass
         ico.setStyleSheet("background:transparent; border:none;")
@@ -338,7 +587,7 @@ class ConnectingScreen(QWidget):
         self.ip     = ip
         self.nick   = nick
         self.avatar = avatar
-        self._worker: ConnectWorker | None = None
+        self._probe: TcpProbe | None = None
         self._main_window = None  # держим ссылку — GC не убьёт MainWindow
 
         # Флаг: проверка обновлений уже выполнялась в этой сессии.
@@ -355,17 +604,25 @@ class ConnectingScreen(QWidget):
         self._upd_sigs.dl_done.connect(self._on_dl_done)
         self._upd_sigs.dl_error.connect(self._on_dl_error)
 
+        # dl_progress приходит на каждый HTTP-чанк загрузки. Прогресс-бар и
+        # статус перерисовываем не чаще 10 раз/сек: _on_dl_progress только
+        # запоминает последнее значение, а _flush_dl_progress выводит его.
+        self._pending_pct = 0
+        self._shown_pct = -1
+        self._pct_timer = QTimer(self)
+        self._pct_timer.setInterval(100)
+        self._pct_timer.timeout.connect(self._flush_dl_progress)
+
         self._build_ui()
         self._start_probe()
+        QTimer.singleShot(0, self._prewarm_images)
 
     # ──────────────────────────────────────────────────────────────────────────
     # UI
     # ──────────────────────────────────────────────────────────────────────────
     def _build_ui(self):
-        from version import APP_NAME, APP_VERSION
         self.setWindowTitle(f"{APP_NAME} v{APP_VERSION}")
         self.setFixedSize(420, 500)
-        self.setWindowIcon(QIcon(resource_path("assets/icon/logo.ico")))
         self.setWindowFlag(Qt.WindowType.FramelessWindowHint)
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
 
@@ -391,7 +648,7 @@ class ConnectingScreen(QWidget):
         sep = QFrame()
         sep.setFrameShape(QFrame.Shape.HLine)
         sep.setFixedHeight(1)
-        sep.setStyleSheet("background: rgba(255,255,255,0.08); border: none;")
+        sep.setStyleSheet(_SEPARATOR_SS)
         card_lay.addWidget(sep)
 
         # ── Контент ───────────────────────────────────────────────────────────
@@ -412,19 +669,13 @@ class ConnectingScreen(QWidget):
         self.lbl_status = QLabel("Проверка обновлений...")
         self.lbl_status.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.lbl_status.setWordWrap(True)
-        self.lbl_status.setStyleSheet(
-            "font-size: 17px; font-weight: bold; color: #cdd6f4; "
-            "background: transparent; border: none;"
-        )
+        self.lbl_status.setStyleSheet(_STATUS_SS_NORMAL)
         root.addWidget(self.lbl_status)
 
         # ── IP (серым, мелко) ──────────────────────────────────────────────────
         self.lbl_ip = QLabel(f"Адрес:  {self.ip}")
         self.lbl_ip.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.lbl_ip.setStyleSheet(
-            "color: rgba(200,210,224,0.55); font-size: 13px; "
-            "background: transparent; border: none;"
-        )
+        self.lbl_ip.setStyleSheet(_ADDRESS_LABEL_SS)
         root.addWidget(self.lbl_ip)
 
         # ── Прогресс-бар (скачивание обновления) ──────────────────────────────
@@ -445,10 +696,7 @@ class ConnectingScreen(QWidget):
         self.lbl_error = QLabel()
         self.lbl_error.setWordWrap(True)
         self.lbl_error.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.lbl_error.setStyleSheet(
-            "color: #ff8080; font-size: 13px; font-weight: 500; "
-            "background: transparent; border: none;"
-        )
+        self.lbl_error.setStyleSheet(_ERROR_LABEL_SS)
         err_lay.addWidget(self.lbl_error)
         self.frm_error.hide()
         root.addWidget(self.frm_error)
@@ -484,52 +732,45 @@ class ConnectingScreen(QWidget):
     # ──────────────────────────────────────────────────────────────────────────
     # Картинка
     # ──────────────────────────────────────────────────────────────────────────
+    @staticmethod
+    def _load_state_pixmap(state: str) -> QPixmap | None:
+        """
+        Возвращает готовый (уже отмасштабированный) QPixmap для состояния
+        или None, если файла картинки нет и нужен эмодзи-fallback.
+
+        Декодирование и масштабирование выполняются один раз на процесс:
+        результат хранится в QPixmapCache, повторные ретраи берут его оттуда.
+        """
+        if state == "fail":
+            if _FAIL_ASSET is None:
+                return None
+            return _cached_scaled_pixmap(_FAIL_ASSET, 120, 120)
+        # connecting
+        if _LOGO_ASSET is None:
+            return None
+        return _cached_scaled_pixmap(_LOGO_ASSET, 90, 90)
+
+    def _prewarm_images(self):
+        """Декодирует картинку «fail» в простое event loop, а не в момент ошибки."""
+        self._load_state_pixmap("fail")
+
     def _set_image(self, state: str):
         """
         state = "connecting" | "fail"
         Для fail ищет assets/fail_connect.svg (или .png) в нескольких
         стандартных местах. Если файла нет — показывает эмодзи-заглушку.
         """
-        if state == "fail":
-            candidates = [
-                resource_path("assets/fail_connect.svg"),
-                resource_path("assets/fail_connect.png"),
-                resource_path("assets/icon/fail_connect.svg"),
-                resource_path("assets/icon/fail_connect.png"),
-                resource_path("assets/images/fail_connect.svg"),
-                resource_path("assets/images/fail_connect.png"),
-            ]
-            for path in candidates:
-                if os.path.exists(path):
-                    px = QPixmap(path).scaled(
-                        120, 120,
-                        Qt.AspectRatioMode.KeepAspectRatio,
-                        Qt.TransformationMode.SmoothTransformation,
-                    )
-                    self.lbl_img.setPixmap(px)
-                    self.lbl_img.setStyleSheet("")
-                    self.lbl_img.setText("")
-                    return
-            # Файла нет — эмодзи fallback
-            self.lbl_img.setPixmap(QPixmap())
-            self.lbl_img.setText("❌")
-            self.lbl_img.setStyleSheet("font-size: 72px;")
-
-        else:  # connecting
-            logo = resource_path("assets/icon/logo.ico")
-            if os.path.exists(logo):
-                px = QPixmap(logo).scaled(
-                    90, 90,
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation,
-                )
-                self.lbl_img.setPixmap(px)
-                self.lbl_img.setStyleSheet("")
-                self.lbl_img.setText("")
-            else:
-                self.lbl_img.setPixmap(QPixmap())
-                self.lbl_img.setText("🔄")
-                self.lbl_img.setStyleSheet("font-size: 72px;")
+        px = self._load_state_pixmap(state)
+        if px is not None:
+            self.lbl_img.setPixmap(px)
+            self.lbl_img.setStyleSheet("")
+            self.lbl_img.setText("")
+            return
+
+        # Файла нет — эмодзи fallback
+        self.lbl_img.setPixmap(QPixmap())
+        self.lbl_img.setText("❌" if state == "fail" else "🔄")
+        self.lbl_img.setStyleSheet(_EMOJI_IMAGE_SS)
 
     # ──────────────────────────────────────────────────────────────────────────
     # Главная точка входа (вызывается при старте и при нажатии «Повторить»)
@@ -542,22 +783,28 @@ class ConnectingScreen(QWidget):
         При повторных попытках (retry после падения сервера) проверку пропускаем
         и сразу идём к TCP-probe, чтобы не раздражать пользователя лишней паузой.
         """
-        # Сбрасываем UI в исходное состояние
-        self.frm_error.hide()
-        self.btn_retry.hide()
-        self.btn_change_ip.hide()
-        self.btn_skip_update.hide()
-        self.progress_bar.hide()
-        self.progress_bar.setValue(0)
-        self.lbl_ip.setText(f"Адрес:  {self.ip}")
-        self._set_image("connecting")
-
-        if not self._update_checked:
-            # Первый запуск — проверяем обновления перед подключением
-            self._check_for_update_then_connect()
-        else:
-            # Повторная попытка — сразу к TCP-probe
-            self._do_tcp_probe()
+        with _batched_updates(self):
+            # Сбрасываем UI в исходное состояние
+            self.frm_error.hide()
+            self.btn_retry.hide()
+            self.btn_change_ip.hide()
+            self.btn_skip_update.hide()
+            self.progress_bar.hide()
+            self.progress_bar.setValue(0)
+            self.lbl_ip.setText(f"Адрес:  {self.ip}")
+            self._set_image("connecting")
+
+            if self._update_checked:
+                # Повторная попытка — сразу к TCP-probe
+                self._do_tcp_probe()
+            elif update_check_is_fresh(load_config()):
+                # Версия подтверждена недавно (UPDATE_CHECK_TTL_SEC) — без запроса к GitHub
+                self._update_checked = True
+                print("[Updater] Проверка выполнялась недавно, пропускаем.")
+                self._do_tcp_probe()
+            else:
+                # Первый запуск — проверяем обновления перед подключением
+                self._check_for_update_then_connect()
 
     # ──────────────────────────────────────────────────────────────────────────
     # ШАГ 1: Проверка обновлений
@@ -565,20 +812,20 @@ class ConnectingScreen(QWidget):
     def _check_for_update_then_connect(self):
         """Запускает проверку обновлений в фоне. Результат придёт через сигналы."""
         self.lbl_status.setText("Проверка обновлений...")
-        self.lbl_status.setStyleSheet(
-            "font-size: 17px; font-weight: bold; color: #cdd6f4; background: transparent; border: none;"
-        )
+        self.lbl_status.setStyleSheet(_STATUS_SS_NORMAL)
 
+        from updater import check_for_updates_async
         sigs = self._upd_sigs
         check_for_updates_async(
-            on_update_found=lambda v, u: sigs.update_found.emit(v, u),
-            on_no_update=lambda: sigs.no_update.emit(),
-            on_error=lambda msg: sigs.check_error.emit(msg),
+            on_update_found=sigs.update_found.emit,
+            on_no_update=sigs.no_update.emit,
+            on_error=sigs.check_error.emit,
         )
 
     def _on_no_update(self):
         """Обновлений нет — переходим к TCP-probe."""
         self._update_checked = True
+        remember_update_check(APP_VERSION)
         print("[Updater] Версия актуальна, продолжаем подключение.")
         self._do_tcp_probe()
 
@@ -600,22 +847,33 @@ class ConnectingScreen(QWidget):
         print(f"[Updater] Найдена новая версия {new_version}, скачиваем...")
 
         self.lbl_status.setText(f"⬇️  Обновление {new_version}")
-        self.lbl_status.setStyleSheet(
-            "font-size: 17px; font-weight: bold; color: #c39ef5; background: transparent; border: none;"
-        )
+        self.lbl_status.setStyleSheet(_STATUS_SS_UPDATE)
         self.progress_bar.setValue(0)
         self.progress_bar.show()
 
+        from updater import download_and_install
         sigs = self._upd_sigs
         download_and_install(
             download_url=download_url,
-            on_progress=lambda pct: sigs.dl_progress.emit(pct),
-            on_done=lambda: sigs.dl_done.emit(),
-            on_error=lambda msg: sigs.dl_error.emit(msg),
+            on_progress=sigs.dl_progress.emit,
+            on_done=sigs.dl_done.emit,
+            on_error=sigs.dl_error.emit,
         )
 
     def _on_dl_progress(self, pct: int):
-        """Обновляем прогресс-бар скачивания."""
+        """Запоминаем прогресс скачивания; на экран его выводит _flush_dl_progress."""
+        self._pending_pct = pct
+        if not self._pct_timer.isActive():
+            self._pct_timer.start()
+
+    def _flush_dl_progress(self):
+        """Обновляем прогресс-бар скачивания (по таймеру, ≤ 10 раз/сек)."""
+        pct = self._pending_pct
+        if pct == self._shown_pct:
+            # Новых данных с прошлого тика нет — таймер не крутим вхолостую
+            self._pct_timer.stop()
+            return
+        self._shown_pct = pct
         self.progress_bar.setValue(pct)
         # Показываем мегабайты только если нет — оставим числовой %
         self.lbl_status.setText(f"⬇️  Скачивание обновления...  {pct}%")
@@ -625,11 +883,10 @@ class ConnectingScreen(QWidget):
         Скачивание завершено — updater сейчас запустит bat-лончер и вызовет
         sys.exit(0). Показываем финальный статус на случай небольшой задержки.
         """
+        self._pct_timer.stop()
         self.progress_bar.setValue(100)
         self.lbl_status.setText("✅  Обновление установлено, перезапуск...")
-        self.lbl_status.setStyleSheet(
-            "font-size: 17px; font-weight: bold; color: #82e0aa; background: transparent; border: none;"
-        )
+        self.lbl_status.setStyleSheet(_STATUS_SS_OK)
 
     def _on_dl_error(self, msg: str):
         """
@@ -637,14 +894,14 @@ class ConnectingScreen(QWidget):
         войти без обновления через кнопку «Пропустить».
         """
         print(f"[Updater] Ошибка скачивания: {msg}")
-        self.progress_bar.hide()
-        self.lbl_status.setText("Ошибка обновления")
-        self.lbl_status.setStyleSheet(
-            "font-size: 17px; font-weight: bold; color: #ff8080; background: transparent; border: none;"
-        )
-        self.lbl_error.setText(f"⚠️  {msg}")
-        self.frm_error.show()
-        self.btn_skip_update.show()
+        self._pct_timer.stop()
+        with _batched_updates(self):
+            self.progress_bar.hide()
+            self.lbl_status.setText("Ошибка обновления")
+            self.lbl_status.setStyleSheet(_STATUS_SS_ERROR)
+            self.lbl_error.setText(f"⚠️  {msg}")
+            self.frm_error.show()
+            self.btn_skip_update.show()
 
     def _skip_update(self):
         """
@@ -652,63 +909,58 @@ class ConnectingScreen(QWidget):
         переходим сразу к TCP-probe (update_checked уже True, retry не будет
         снова лезть в updater).
         """
-        self.frm_error.hide()
-        self.btn_skip_update.hide()
-        self.progress_bar.hide()
-        self.lbl_status.setStyleSheet(
-            "font-size: 17px; font-weight: bold; color: #cdd6f4; background: transparent; border: none;"
-        )
-        self._do_tcp_probe()
+        with _batched_updates(self):
+            self.frm_error.hide()
+            self.btn_skip_update.hide()
+            self.progress_bar.hide()
+            self.lbl_status.setStyleSheet(_STATUS_SS_NORMAL)
+            self._do_tcp_probe()
 
     # ──────────────────────────────────────────────────────────────────────────
     # ШАГ 2б: TCP probe (прежняя логика, без изменений)
     # ──────────────────────────────────────────────────────────────────────────
     def _do_tcp_probe(self):
         """Запускает или перезапускает TCP probe (прежняя логика подключения)."""
-        self.lbl_status.setText("Подключение к серверу...")
-        self.lbl_status.setStyleSheet(
-            "font-size: 17px; font-weight: bold; color: #cdd6f4; background: transparent; border: none;"
-        )
-        self.lbl_ip.setText(f"Адрес:  {self.ip}")
-        self.frm_error.hide()
-        self.btn_retry.hide()
-        self.btn_change_ip.hide()
-        self.btn_skip_update.hide()
-        self.progress_bar.hide()
-        self._set_image("connecting")
-
-        if self._worker and self._worker.isRunning():
-            self._worker.quit()
-            self._worker.wait(500)
-
-        self._worker = ConnectWorker(self.ip)
-        self._worker.result.connect(self._on_probe_result)
-        self._worker.start()
+        with _batched_updates(self):
+            self.lbl_status.setText("Подключение к серверу...")
+            self.lbl_status.setStyleSheet(_STATUS_SS_NORMAL)
+            self.lbl_ip.setText(f"Адрес:  {self.ip}")
+            self.frm_error.hide()
+            self.btn_retry.hide()
+            self.btn_change_ip.hide()
+            self.btn_skip_update.hide()
+            self.progress_bar.hide()
+            self._set_image("connecting")
+
+        if self._probe is not None:
+            self._probe.cancel()
+            self._probe.deleteLater()
+
+        self._probe = TcpProbe(self.ip, self)
+        self._probe.result.connect(self._on_probe_result)
+        self._probe.start()
 
     def _on_probe_result(self, ok: bool):
         if ok:
             self.lbl_status.setText("✅  Подключено!")
-            self.lbl_status.setStyleSheet(
-                "font-size: 17px; font-weight: bold; color: #82e0aa; background: transparent; border: none;"
-            )
+            self.lbl_status.setStyleSheet(_STATUS_SS_OK)
             QTimer.singleShot(300, self._open_main_window)
         else:
-            self._set_image("fail")
-            self.lbl_status.setText("Сервер недоступен")
-            self.lbl_status.setStyleSheet(
-                "font-size: 17px; font-weight: bold; color: #ff8080; background: transparent; border: none;"
-            )
-            self.lbl_error.setText(
-                f"Не удалось подключиться к {self.ip}\n"
-                "Проверьте адрес и убедитесь, что сервер запущен."
-            )
-            self.frm_error.show()
-            self.btn_retry.show()
-            self.btn_change_ip.show()
+            with _batched_updates(self):
+                self._set_image("fail")
+                self.lbl_status.setText("Сервер недоступен")
+                self.lbl_status.setStyleSheet(_STATUS_SS_ERROR)
+                self.lbl_error.setText(
+                    f"Не удалось подключиться к {self.ip}\n"
+                    "Проверьте адрес и убедитесь, что сервер запущен."
+                )
+                self.frm_error.show()
+                self.btn_retry.show()
+                self.btn_change_ip.show()
 
     def _open_main_window(self):
+        from ui_main import MainWindow
         self._main_window = MainWindow(self.ip, self.nick, self.avatar)
-        self._main_window.setWindowIcon(QIcon(resource_path("assets/icon/logo.ico")))
         self._main_window.show()
         # ✅ hide() — Qt не считает это закрытием последнего окна
         self.hide()
@@ -750,10 +1002,8 @@ class LoginWindow(QWidget):
     # UI
     # ------------------------------------------------------------------
     def _build_ui(self, ip: str, nick: str):
-        from version import APP_NAME, APP_VERSION
         self.setWindowTitle(f"{APP_NAME} v{APP_VERSION} — Вход")
         self.setFixedSize(380, 580)
-        self.setWindowIcon(QIcon(resource_path("assets/icon/logo.ico")))
         self.setWindowFlag(Qt.WindowType.FramelessWindowHint)
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
 
@@ -779,7 +1029,7 @@ class LoginWindow(QWidget):
         sep = QFrame()
         sep.setFrameShape(QFrame.Shape.HLine)
         sep.setFixedHeight(1)
-        sep.setStyleSheet("background: rgba(255,255,255,0.08); border: none;")
+        sep.setStyleSheet(_SEPARATOR_SS)
         card_lay.addWidget(sep)
 
         # ── Контент ───────────────────────────────────────────────────────────
@@ -802,21 +1052,7 @@ class LoginWindow(QWidget):
 
         btn_av = QPushButton("🖼  Выбрать аватарку")
         btn_av.setCursor(Qt.CursorShape.PointingHandCursor)
-        btn_av.setStyleSheet("""
-            QPushButton {
-                background-color: rgba(91,142,245,0.16);
-                color: #8ab0f5;
-                border: 1px solid rgba(91,142,245,0.40);
-                border-radius: 6px;
-                font-size: 13px;
-                padding: 5px 14px;
-            }
-            QPushButton:hover {
-                background-color: rgba(91,142,245,0.28);
-                border-color: rgba(91,142,245,0.70);
-                color: #ffffff;
-            }
-        """)
+        btn_av.setStyleSheet(_BTN_AVATAR_SS)
         btn_av.clicked.connect(self._open_avatar_picker)
         layout.addWidget(btn_av, alignment=Qt.AlignmentFlag.AlignCenter)
 
@@ -824,10 +1060,7 @@ class LoginWindow(QWidget):
 
         # ── IP ────────────────────────────────────────────────────────────────
         lbl_ip = QLabel("IP-адрес сервера")
-        lbl_ip.setStyleSheet(
-            "font-size: 12px; font-weight: bold; color: #8899bb; "
-            "background: transparent; border: none;"
-        )
+        lbl_ip.setStyleSheet(_FIELD_LABEL_SS)
         layout.addWidget(lbl_ip)
         self.ip_in = QLineEdit(ip)
         self.ip_in.setPlaceholderText("например: 192.168.1.100")
@@ -835,10 +1068,7 @@ class LoginWindow(QWidget):
 
         # ── Ник ───────────────────────────────────────────────────────────────
         lbl_nick = QLabel("Никнейм")
-        lbl_nick.setStyleSheet(
-            "font-size: 12px; font-weight: bold; color: #8899bb; "
-            "background: transparent; border: none;"
-        )
+        lbl_nick.setStyleSheet(_FIELD_LABEL_SS)
         layout.addWidget(lbl_nick)
         self.nick_in = QLineEdit(nick)
         self.nick_in.setPlaceholderText("User")
@@ -858,10 +1088,7 @@ class LoginWindow(QWidget):
         self.lbl_error = QLabel()
         self.lbl_error.setWordWrap(True)
         self.lbl_error.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.lbl_error.setStyleSheet(
-            "color: #ff8080; font-size: 13px; font-weight: 500; "
-            "background: transparent; border: none;"
-        )
+        self.lbl_error.setStyleSheet(_ERROR_LABEL_SS)
         err_lay.addWidget(self.lbl_error)
         self.frm_error.hide()
         layout.addWidget(self.frm_error)
@@ -879,14 +1106,19 @@ class LoginWindow(QWidget):
     # Аватарка
     # ------------------------------------------------------------------
     def _open_avatar_picker(self):
+        from ui_dialogs import AvatarSelector
         d = AvatarSelector(self)
         if d.exec():
             self.current_avatar = d.selected_avatar
             self._refresh_avatar()
 
     def _refresh_avatar(self):
+        # Разбор SVG через QIcon — один раз на аватар, дальше берём из QPixmapCache
         p = resource_path(f"assets/avatars/{self.current_avatar}")
-        px = QIcon(p).pixmap(100, 100) if os.path.exists(p) else QIcon().pixmap(0, 0)
+        px = _cached_pixmap(
+            f"avatar:{p}:100x100",
+            lambda: QIcon(p).pixmap(100, 100) if os.path.exists(p) else QIcon().pixmap(0, 0),
+        )
         self.avatar_lbl.setPixmap(px)
 
     # ------------------------------------------------------------------
@@ -925,9 +1157,6 @@ class LoginWindow(QWidget):
         # ✅ self._connecting_screen — не локальная переменная!
         # Сохраняем в атрибут, иначе GC убьёт объект сразу после return.
         self._connecting_screen = ConnectingScreen(ip, nick, avatar)
-        self._connecting_screen.setWindowIcon(
-            QIcon(resource_path("assets/icon/logo.ico"))
-        )
         self._connecting_screen.show_login.connect(self._on_return_from_connecting)
         self._connecting_screen.show()
 
@@ -949,41 +1178,57 @@ class LoginWindow(QWidget):
 # Точка входа
 # ══════════════════════════════════════════════════════════════════════════════
 if __name__ == "__main__":
-    # ── Дамп аудио-устройств до создания QApplication ───────────────────────
+    # ── Дамп аудио-устройств ─────────────────────────────────────────────────
     # Если PortAudio крашится уже при query_devices() — увидим это в логе.
-    try:
-        import sounddevice as _sd
-        print("[DEBUG] Аудио-устройства системы:", flush=True)
-        for _i, _d in enumerate(_sd.query_devices()):
-            _api = _sd.query_hostapis(_d['hostapi'])['name']
-            print(f"  [{_i:2d}] IN={_d['max_input_channels']} OUT={_d['max_output_channels']} "
-                  f"| {_d['name']} ({_api})", flush=True)
-        print(f"[DEBUG] Дефолтное устройство: IN={_sd.default.device[0]}, OUT={_sd.default.device[1]}", flush=True)
-    except Exception as _ex:
-        print(f"[DEBUG] query_devices() упал: {_ex}", flush=True)
+    # Выполняется после показа первого окна: импорт sounddevice + инициализация
+    # PortAudio + перебор устройств занимают сотни мс и не нужны для отрисовки
+    # ConnectingScreen / LoginWindow (faulthandler уже включён).
+    def _dump_audio_devices():
+        try:
+            import sounddevice as _sd
+            print("[DEBUG] Аудио-устройства системы:", flush=True)
+            for _i, _d in enumerate(_sd.query_devices()):
+                _api = _sd.query_hostapis(_d['hostapi'])['name']
+                print(f"  [{_i:2d}] IN={_d['max_input_channels']} OUT={_d['max_output_channels']} "
+                      f"| {_d['name']} ({_api})", flush=True)
+            print(f"[DEBUG] Дефолтное устройство: IN={_sd.default.device[0]}, OUT={_sd.default.device[1]}", flush=True)
+        except Exception as _ex:
+            print(f"[DEBUG] query_devices() упал: {_ex}", flush=True)
 
     # Перехват исключений в дочерних (не-Qt) потоках
-    import threading as _threading
-    _orig_thread_excepthook = getattr(_threading, 'excepthook', None)
+    _orig_thread_excepthook = getattr(threading, 'excepthook', None)
     def _thread_excepthook(args):
-        import traceback as _tb
-        msg = "".join(_tb.format_exception(args.exc_type, args.exc_value, args.exc_traceback))
+        msg = "".join(traceback.format_exception(args.exc_type, args.exc_value, args.exc_traceback))
         print(f"[CRASH] Исключение в потоке '{args.thread.name}':\n{msg}", flush=True)
-        with open("crash_python.log", "a", encoding="utf-8") as _f:
-            _f.write(f"Thread '{args.thread.name}':\n{msg}")
+        with _crash_log_lock:
+            _crash_python_log.write(f"Thread '{args.thread.name}':\n{msg}")
         if _orig_thread_excepthook:
             _orig_thread_excepthook(args)
-    _threading.excepthook = _thread_excepthook
+    threading.excepthook = _thread_excepthook
     print("[DEBUG] threading.excepthook установлен", flush=True)
 
     # ✅ КРИТИЧНО: QSurfaceFormat ДО создания QApplication
+    # SwapInterval(0): без ожидания vsync — кадр показывается сразу после
+    # декодирования, задержка видео ниже на до 16 мс (ценой возможного тиринга).
+    # Core 3.3 — стабильный профиль без накладных расходов compat-режима драйвера.
+    # PULSECHAT_VSYNC=1 возвращает прежний формат (vsync, профиль по умолчанию).
     _gl_fmt = QSurfaceFormat()
     _gl_fmt.setSwapBehavior(QSurfaceFormat.SwapBehavior.DoubleBuffer)
-    _gl_fmt.setSwapInterval(1)
+    if os.environ.get("PULSECHAT_VSYNC") == "1":
+        _gl_fmt.setSwapInterval(1)
+    else:
+        _gl_fmt.setSwapInterval(0)
+        _gl_fmt.setProfile(QSurfaceFormat.OpenGLContextProfile.CoreProfile)
+        _gl_fmt.setVersion(3, 3)
     QSurfaceFormat.setDefaultFormat(_gl_fmt)
 
     app = QApplication(sys.argv)
 
+    # Одна QIcon на процесс: .ico читается и декодируется один раз, все окна
+    # (в т.ч. MainWindow и окна стрима) наследуют иконку приложения.
+    APP_ICON = QIcon(ASSETS.ICON_LOGO)
+    app.setWindowIcon(APP_ICON)
+
     # ✅ Глобальные переменные — держим ссылки на оба возможных окна.
     # Без этого Python GC уничтожит объект после выхода из блока if/else,
     # Qt получит висячий указатель и окно мгновенно закроется.
@@ -999,7 +1244,6 @@ if __name__ == "__main__":
         avatar = config.get("avatar", "1.svg")
 
         _connect_screen = ConnectingScreen(ip, nick, avatar)
-        _connect_screen.setWindowIcon(QIcon(resource_path("assets/icon/logo.ico")))
 
         def _fallback_to_login(f_ip: str, f_nick: str, f_avatar: str):
             """
@@ -1014,7 +1258,6 @@ if __name__ == "__main__":
                     "Измените адрес и нажмите «Войти»."
                 )
             )
-            _login_window.setWindowIcon(QIcon(resource_path("assets/icon/logo.ico")))
             _login_window.show()
 
         _connect_screen.show_login.connect(_fallback_to_login)
@@ -1023,7 +1266,9 @@ if __name__ == "__main__":
     else:
         # ── Первый запуск → форма логина ────────────────────────────────
         _login_window = LoginWindow()
-        _login_window.setWindowIcon(QIcon(resource_path("assets/icon/logo.ico")))
         _login_window.show()
 
+    # Первое окно уже отрисуется к моменту срабатывания таймера
+    QTimer.singleShot(100, _dump_audio_devices)
+
     sys.exit(app.exec())
\ No newline at end of file
@@ -1,25 +1,65 @@
 import sys
 import os
+import json
 import struct
+from functools import lru_cache
+from types import SimpleNamespace
 
 # --- Утилиты ---
+# Базовая папка ресурсов вычисляется один раз: sys._MEIPASS (PyInstaller)
+# или текущая папка (dev). Приложение не меняет cwd во время работы.
+BASE_PATH = getattr(sys, "_MEIPASS", None) or os.path.abspath(".")
+
+
+@lru_cache(maxsize=128)
 def resource_path(relative_path):
     """ Получает абсолютный путь к ресурсам, работает и для dev, и для PyInstaller """
+    return os.path.join(BASE_PATH, relative_path)
+
+
+# Часто используемые ассеты — пути собираются один раз при импорте.
+# Доступ атрибутом: ASSETS.ICON_LOGO, ASSETS.STATUS_DIR и т.д.
+ASSETS = SimpleNamespace(
+    ICON_LOGO       = resource_path(os.path.join("assets", "icon", "logo.ico")),
+    ICON_APP        = resource_path(os.path.join("assets", "icon", "app_icon.ico")),
+    ICON_WHISPERS   = resource_path(os.path.join("assets", "icon", "whispers.ico")),
+    DANGER_MP3      = resource_path(os.path.join("assets", "music", "Danger.mp3")),
+    STATUS_DIR      = resource_path(os.path.join("assets", "status")),
+    AVATARS_DIR     = resource_path(os.path.join("assets", "avatars")),
+    PANEL_DIR       = resource_path(os.path.join("assets", "panel")),
+)
+
+
+# Переменные окружения PULSECHAT_* (числовые настройки сети и pacing)
+def _env_int(name, default, lo=0, hi=None):
+    """ Целое из переменной окружения name, ограниченное [lo, hi]; при ошибке — default """
     try:
-        base_path = sys._MEIPASS
-    except Exception:
-        base_path = os.path.abspath(".")
-    return os.path.join(base_path, relative_path)
+        value = max(lo, int(os.environ.get(name, default)))
+    except ValueError:
+        print(f"[Config] Некорректное значение {name}, используется {default}")
+        return default
+    return value if hi is None else min(hi, value)
+
 
 # --- Сетевые настройки ---
 DEFAULT_PORT_TCP = 5000
 DEFAULT_PORT_UDP = 5001
 
 # BUFFER_SIZE: максимальный UDP-пакет.
-# UDP_HEADER(13) + VIDEO_HEADER(8) + MAX_VIDEO_PAYLOAD(1400) = 1421 байт.
-# Запас оставлен для роста MAX_VIDEO_PAYLOAD.
+# UDP_HEADER(17) + VIDEO_HEADER(8) + MAX_VIDEO_PAYLOAD(1300) = 1325 байт,
+# при jumbo-MTU — до 8972 байт (MAX_VIDEO_PAYLOAD_JUMBO). Запас — до 64 KB.
 BUFFER_SIZE = 65536
 
+
+def new_recv_buffer():
+    """
+    (bytearray, memoryview) под recvfrom_into() — один буфер на поток приёма
+    вместо нового bytes на каждую датаграмму. Данные, которые нужно хранить
+    дольше следующего recv, вызывающий копирует сам.
+    """
+    buf = bytearray(BUFFER_SIZE)
+    return buf, memoryview(buf)
+
 # Размер системного буфера приёма UDP на сервере (8 MB).
 # При 6 Mbps видео → ~750 KB/s входящего трафика.
 # Увеличен с 1 MB, чтобы пережить кратковременные спайки без дропов пакетов,
@@ -31,6 +71,30 @@ UDP_RECV_BUFFER_SIZE = 8 * 1024 * 1024  # 8 MB
 # Отдельный SO_SNDBUF снижает конкуренцию между recv/send очередями ядра.
 UDP_SEND_BUFFER_SIZE = 8 * 1024 * 1024  # 8 MB
 
+# Оба размера переопределяются переменными окружения (байты):
+#   PULSECHAT_UDP_RCV=16777216 PULSECHAT_UDP_SND=4194304
+# Фактический размер ограничен ядром (net.core.rmem_max / wmem_max) —
+# net_utils.apply_udp_buffers() подбирает максимум, который ядро реально выдало.
+def get_udp_buffers():
+    """ (rcv, snd) — запрошенные размеры UDP-буферов из env или по умолчанию """
+    return (_env_int("PULSECHAT_UDP_RCV", UDP_RECV_BUFFER_SIZE),
+            _env_int("PULSECHAT_UDP_SND", UDP_SEND_BUFFER_SIZE))
+
+
+# Linux: PULSECHAT_UDP_NO_CHECK=1 — исходящие UDP (IPv4) без контрольной суммы
+# (SO_NO_CHECK): ядро не проходит по байтам каждого пакета. Имеет смысл только
+# без аппаратного checksum offload. Выключено по умолчанию: часть NAT/VPN
+# (в т.ч. туннели вроде Radmin) отбрасывает датаграммы с нулевой суммой,
+# а битые пакеты дойдут до Opus/H.264 вместо дропа. Приём по-прежнему
+# проверяет суммы у пакетов, где они есть.
+# Несовместимо с UDP GSO (клиент, Linux): ядро отклоняет UDP_SEGMENT на сокете
+# с SO_NO_CHECK (EINVAL). Если GSO доступен, клиент оставляет GSO — одна
+# sendmsg() на пачку видео дешевле, чем сэкономленный подсчёт сумм, — и
+# SO_NO_CHECK не ставит (см. NetworkClient._do_connect). Сервер GSO не
+# использует, там флаг действует всегда.
+UDP_NO_CHECK_ENABLED = os.environ.get("PULSECHAT_UDP_NO_CHECK", "") == "1"
+
+
 # --- Аудио настройки ---
 SAMPLE_RATE = 48000
 CHANNELS = 1
@@ -49,6 +113,24 @@ VIDEO_BITRATE = 6000000  # 6 Mbps
 # Увеличивать с осторожностью: чем выше — тем меньше эффект pacing.
 VIDEO_PACING_RATE_BYTES_SEC = int(VIDEO_BITRATE * 1.25 / 8)  # ~937 500 байт/сек
 
+# Pacing-поток отправляет видео микро-пачками по VIDEO_PACING_BURST пакетов
+# (одним sendmmsg/GSO на Linux) и спит интервал всей пачки: средняя скорость
+# та же, а пробуждений и системных вызовов в N раз меньше. 4 × ~1.3 KB ≈ 5 KB
+# за раз — на порядки меньше исходных burst'ов IDR-кадров (100-300 пакетов).
+# PULSECHAT_PACING_BURST=1 — строго по одному пакету на интервал.
+VIDEO_PACING_BURST = _env_int("PULSECHAT_PACING_BURST", 4, 1, 32)
+
+# Linux: PULSECHAT_KERNEL_PACING=1 отдаёт pacing ядру (SO_MAX_PACING_RATE +
+# qdisc fq: `tc qdisc replace dev eth0 root fq`) — pacing-поток не спит между
+# пакетами. Выключено по умолчанию: лимит действует на весь UDP-сокет, и голос
+# встаёт в очередь fq за пачкой видео-пакетов (+десятки мс к задержке звука).
+KERNEL_PACING_ENABLED = os.environ.get("PULSECHAT_KERNEL_PACING", "") == "1"
+
+# PULSECHAT_BUSY_PACE=1 — pacing-поток ждёт дедлайнов только busy-wait'ом,
+# без sleep(): минимальный джиттер ценой одного ядра на 100% пока идёт видео.
+# Для выделенных машин захвата/стрима; по умолчанию выключено.
+BUSY_PACING_ENABLED = os.environ.get("PULSECHAT_BUSY_PACE", "") == "1"
+
 # Флаг для UDP заголовка (битмаска):
 # 1=Mute, 2=Deaf, 4=Video, 8=StreamAudio, 16=LoopbackAudio, 32=StreamVoices, 64=Whisper, 254=Ping
 FLAG_VIDEO          = 4
@@ -75,7 +157,19 @@ STREAM_VOICE_HEADER_SIZE   = STREAM_VOICE_HEADER_STRUCT.size
 # чтобы не смешиваться с его же микрофонным потоком (ключ X).
 LOOPBACK_UID_OFFSET = 1_000_000
 
+# MAX_VIDEO_PAYLOAD: размер видео-чанка по умолчанию и его потолок.
+# 1300 оставляет ~150 байт запаса под PPPoE / VPN / туннели — важно не только
+# для пути до сервера: сервер ретранслирует те же датаграммы всем зрителям,
+# у каждого из которых свой путь. При подключении чанк может только
+# уменьшиться, если MTU маршрута до сервера меньше
+# (NetworkClient.net_params.max_payload).
+# PULSECHAT_JUMBO_VIDEO=1 — для LAN / jumbo-frame сетей, где MTU интерфейса
+# заведомо есть у всех участников: чанк растёт до MTU маршрута, но не больше
+# MAX_VIDEO_PAYLOAD_JUMBO.
 MAX_VIDEO_PAYLOAD = 1300
+JUMBO_VIDEO_ENABLED = os.environ.get("PULSECHAT_JUMBO_VIDEO", "") == "1"
+IP_UDP_OVERHEAD = 28                 # IPv4 (20) + UDP (8)
+MIN_VIDEO_PAYLOAD = 512              # ниже — слишком много пакетов на кадр
 VIDEO_CHUNK_HEADER = struct.Struct("!IHH")
 VIDEO_HEADER_SIZE = VIDEO_CHUNK_HEADER.size
 
@@ -92,6 +186,72 @@ VIDEO_CHUNK_STRUCT = VIDEO_CHUNK_HEADER
 UDP_HEADER_STRUCT = struct.Struct("!IdIB")
 UDP_HEADER_SIZE = UDP_HEADER_STRUCT.size
 
+# Смещения полей внутри заголовка — для шаблонов, где меняется одно поле
+UDP_HEADER_TS_OFFSET    = 4                     # после uid (I)
+UDP_HEADER_SEQ_OFFSET   = 12                    # после timestamp (d)
+UDP_HEADER_FLAGS_OFFSET = UDP_HEADER_SIZE - 1   # последний байт (B)
+UDP_TS_PACK_INTO        = struct.Struct("!d").pack_into
+UDP_SEQ_PACK_INTO       = struct.Struct("!I").pack_into
+
+# Заранее связанные методы Struct для горячих путей (на каждый пакет):
+# без поиска атрибута и без среза data[:N] — unpack_from читает прямо из буфера.
+UDP_HEADER_PACK          = UDP_HEADER_STRUCT.pack
+UDP_HEADER_PACK_INTO     = UDP_HEADER_STRUCT.pack_into
+UDP_HEADER_UNPACK_FROM   = UDP_HEADER_STRUCT.unpack_from
+VIDEO_CHUNK_PACK         = VIDEO_CHUNK_HEADER.pack
+VIDEO_CHUNK_PACK_INTO    = VIDEO_CHUNK_HEADER.pack_into
+VIDEO_CHUNK_UNPACK_FROM  = VIDEO_CHUNK_HEADER.unpack_from
+STREAM_VOICE_PACK        = STREAM_VOICE_HEADER_STRUCT.pack
+STREAM_VOICE_UNPACK_FROM = STREAM_VOICE_HEADER_STRUCT.unpack_from
+
+# UDP header + uid (target_uid шёпота / speaker_uid голоса стрима) одним pack:
+# пакет собирается одной конкатенацией с opus вместо двух.
+# Формат на проводе тот же: "!IdIB" + "!I".
+UDP_HEADER_UID_STRUCT = struct.Struct("!IdIBI")
+UDP_HEADER_UID_PACK   = UDP_HEADER_UID_STRUCT.pack
+
+# --- TCP: фрейминг JSON-сообщений (в обе стороны: клиент ↔ сервер) ---
+# [длина: 4 байта big-endian unsigned int] + [UTF-8 JSON]. Получатель режет
+# поток по длине и парсит каждое сообщение ровно один раз — без raw_decode
+# по хвосту. Несовместимо со старым форматом (голый JSON): первые 4 байта
+# старого сообщения читаются как длина > MAX_TCP_FRAME → разрыв соединения,
+# поэтому клиент и сервер обновляются только вместе.
+TCP_FRAME_STRUCT      = struct.Struct("!I")
+TCP_FRAME_HEADER_SIZE = TCP_FRAME_STRUCT.size
+TCP_FRAME_PACK        = TCP_FRAME_STRUCT.pack
+TCP_FRAME_UNPACK_FROM = TCP_FRAME_STRUCT.unpack_from
+# Самые крупные сообщения — кастомный soundboard (аудио в base64)
+MAX_TCP_FRAME = 16 * 1024 * 1024
+
+
+def pack_frame(body: bytes) -> bytes:
+    """ Префиксует закодированное JSON-сообщение длиной (TCP_FRAME_STRUCT) """
+    return TCP_FRAME_PACK(len(body)) + body
+
+
+# JSON-кодек TCP-сообщений — один на клиент и сервер, чтобы кодировщики
+# сторон не разъехались. msgspec.json.encode/decode в разы быстрее
+# json.dumps/loads на крупных sync_users; encode сразу отдаёт UTF-8 bytes.
+# Необязательная зависимость: без неё — stdlib json, формат на проводе тот же.
+# msgspec.DecodeError — подкласс ValueError, обработка ошибок общая.
+try:
+    import msgspec
+    json_dumps = msgspec.json.encode
+    json_loads = msgspec.json.decode
+except ImportError:
+    def json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+    json_loads = json.loads
+
+
+# Максимальный размер исходящего видео-пакета: [UDP header][VIDEO_CHUNK header][payload].
+# Размер слота в пуле пакетов NetworkClient (pack_into без промежуточных bytes).
+VIDEO_PACKET_SLOT_SIZE = UDP_HEADER_SIZE + VIDEO_HEADER_SIZE + MAX_VIDEO_PAYLOAD
+
+# Верхняя граница payload при jumbo-кадрах (MTU 9000) — чтобы пакет
+# гарантированно влезал в BUFFER_SIZE приёмника и сервера.
+MAX_VIDEO_PAYLOAD_JUMBO = 9000 - IP_UDP_OVERHEAD - UDP_HEADER_SIZE - VIDEO_HEADER_SIZE
+
 # VIDEO_LOW_QUALITY_IDR_INTERVAL_MS: константа нужна ui_video.py для IDR-таймера.
 # В текущей архитектуре (без quality routing) таймер запускается, но отправляет
 # запрос в stub-метод net.request_viewer_keyframe() → ничего не происходит.
@@ -127,4 +287,4 @@ CMD_NUDGE_TRIGGERED = 'nudge_triggered'
 NUDGE_COOLDOWN_SEC  = 600  # 10 минут
 
 # Путь к звуковому файлу «Пнуть» — всегда через resource_path (работает и в dev, и в exe).
-NUDGE_SOUND_PATH = resource_path(os.path.join("assets", "music", "Danger.mp3"))
\ No newline at end of file
+NUDGE_SOUND_PATH = ASSETS.DANGER_MP3
\ No newline at end of file
@@ -5,11 +5,12 @@ make_requirements.py
 Генерирует чистый requirements.txt — только то, что реально импортируется
 в коде проекта, без мусора накопленного pip freeze в виртуальном окружении.
 
-Использует pipreqs. Установка (один раз):
+Использует pipreqs (вызывается в текущем процессе). Установка (один раз):
     pip install pipreqs
 
 Запуск из корня проекта:
-    python make_requirements.py
+    python make_requirements.py           # пропускает, если исходники не менялись
+    python make_requirements.py --force   # генерировать всегда
 
 Результат: requirements.txt в корне проекта.
 ──────────────────────────────────────────────────────────────────────────────
@@ -18,90 +19,118 @@ make_requirements.py
 import subprocess
 import sys
 import os
+import json
+import importlib
 
 
-def _get_pipreqs_exe() -> str:
-    """
-    Возвращает путь к исполняемому файлу pipreqs.
-    Ищет в папке Scripts/bin рядом с текущим python.exe —
-    это надёжно работает и с venv, и с глобальным окружением.
-
-    pipreqs 0.5.x не имеет __main__.py, поэтому 'python -m pipreqs'
-    не работает — нужно запускать exe напрямую.
-    """
-    scripts_dir = os.path.dirname(sys.executable)   # .venv/Scripts  (Windows)
-                                                     # .venv/bin      (Linux/Mac)
-    # Windows
-    candidate_win = os.path.join(scripts_dir, "pipreqs.exe")
-    if os.path.exists(candidate_win):
-        return candidate_win
+# Папки, которые не сканируются (и не учитываются при проверке актуальности).
+IGNORE_DIRS = ("dist", "build", "__pycache__", ".git", "venv", ".venv", "env")
 
-    # Linux / Mac
-    candidate_unix = os.path.join(scripts_dir, "pipreqs")
-    if os.path.exists(candidate_unix):
-        return candidate_unix
+# pipreqs не умеет определять некоторые пакеты по имени модуля.
+# Добавляем их вручную если они не попали в вывод.
+MANUAL_ADDITIONS = {
+    "PyQt6":                    "PyQt6>=6.4",
+    "packaging":                "packaging>=23.0",   # нужен updater.py
+    "opuslib":                  "opuslib",
+    "sounddevice":              "sounddevice",
+    "numpy":                    "numpy",
+    "pygame":                   "pygame",
+    "py7zr":                    "py7zr>=0.20",       # нужен updater.py (распаковка .7z)
+    "opencv-python-headless":   "opencv-python-headless",  # нужен dxcam внутри себя
+    "msgspec":                  "msgspec",           # быстрый JSON: user_config.json, TCP-сообщения (try/except)
+    # pipreqs не видит "import py7zr" внутри try/except — добавляем вручную
+}
 
-    return ""   # не найден — установим ниже
+STAMP_NAME = ".requirements.stamp"
 
 
-def main():
-    pipreqs_exe = _get_pipreqs_exe()
-
-    # Если pipreqs не установлен — ставим и ищем ещё раз
-    if not pipreqs_exe:
-        print("pipreqs не найден. Установка...")
-        subprocess.run(
-            [sys.executable, "-m", "pip", "install", "pipreqs"],
-            check=True
-        )
-        pipreqs_exe = _get_pipreqs_exe()
-
-    if not pipreqs_exe:
-        print("ОШИБКА: pipreqs.exe не найден даже после установки.")
-        print(f"Папка Scripts: {os.path.dirname(sys.executable)}")
+def _import_pipreqs():
+    """
+    Импортирует pipreqs для вызова в текущем процессе (без запуска pipreqs.exe
+    и отдельного интерпретатора). Если пакета нет — ставит его через pip
+    и пробует ещё раз. Возвращает (модуль pipreqs.pipreqs, docopt).
+    """
+    try:
+        from pipreqs import pipreqs as pr
+        from docopt import docopt
+        return pr, docopt
+    except ImportError:
+        pass
+
+    print("pipreqs не найден. Установка...")
+    subprocess.run([sys.executable, "-m", "pip", "install", "pipreqs"], check=True)
+    importlib.invalidate_caches()
+    try:
+        from pipreqs import pipreqs as pr
+        from docopt import docopt
+        return pr, docopt
+    except ImportError as e:
+        print(f"ОШИБКА: pipreqs не импортируется даже после установки: {e}")
         print("Попробуйте вручную: pip install pipreqs")
         sys.exit(1)
 
-    print(f"[make_requirements] Используется: {pipreqs_exe}")
 
+def _scan_sources(project_root: str):
+    """ (кол-во .py файлов, максимальный mtime) без папок из IGNORE_DIRS """
+    count, newest = 0, 0.0
+    for dirpath, dirnames, filenames in os.walk(project_root):
+        dirnames[:] = [d for d in dirnames if d not in IGNORE_DIRS]
+        for name in filenames:
+            if name.endswith(".py"):
+                count += 1
+                newest = max(newest, os.path.getmtime(os.path.join(dirpath, name)))
+    return count, newest
+
+
+def _is_up_to_date(output_file: str, stamp_file: str, file_count: int, newest: float) -> bool:
+    """
+    requirements.txt актуален, если он новее всех .py и stamp совпадает
+    по числу файлов (удалённый модуль не меняет mtime остальных) и MANUAL_ADDITIONS.
+    """
+    try:
+        if os.path.getmtime(output_file) < newest:
+            return False
+        with open(stamp_file, "r", encoding="utf-8") as f:
+            stamp = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return (stamp.get("file_count") == file_count
+            and stamp.get("manual_additions") == MANUAL_ADDITIONS)
+
+
+def main():
     project_root = os.path.dirname(os.path.abspath(__file__))
     output_file  = os.path.join(project_root, "requirements.txt")
+    stamp_file   = os.path.join(project_root, STAMP_NAME)
+
+    # pipreqs обходит всё дерево и парсит AST каждого файла — несколько секунд.
+    # Если исходники не менялись с прошлого запуска, пропускаем.
+    file_count, newest = _scan_sources(project_root)
+    if "--force" not in sys.argv[1:] and _is_up_to_date(output_file, stamp_file, file_count, newest):
+        print("[make_requirements] requirements.txt up to date — пропускаю "
+              "(--force для принудительной генерации)")
+        return
+
+    pr, docopt = _import_pipreqs()
 
     print(f"[make_requirements] Сканирую импорты в: {project_root}")
     print(f"[make_requirements] Результат: {output_file}")
 
-    result = subprocess.run(
-        [
-            pipreqs_exe,            # E:\.venv\Scripts\pipreqs.exe
-            project_root,
-            "--force",              # перезаписать если файл уже есть
-            "--encoding", "utf-8",
-            "--savepath", output_file,
-            "--ignore", "dist,build,__pycache__,.git,venv,.venv,env",
-        ],
-        capture_output=True,
-        text=True,
-    )
-
-    if result.returncode != 0:
-        print("ОШИБКА pipreqs:")
-        print(result.stderr or result.stdout)
+    # Аргументы разбираем docopt'ом pipreqs — так в словаре есть все ключи,
+    # которые ожидает pipreqs.init(), в любой версии pipreqs.
+    args = docopt(pr.__doc__, argv=[
+        project_root,
+        "--force",              # перезаписать если файл уже есть
+        "--encoding", "utf-8",
+        "--savepath", output_file,
+        "--ignore", ",".join(IGNORE_DIRS),
+    ])
+    try:
+        pr.init(args)
+    except (Exception, SystemExit) as e:
+        print(f"ОШИБКА pipreqs: {e}")
         sys.exit(1)
 
-    # pipreqs не умеет определять некоторые пакеты по имени модуля.
-    # Добавляем их вручную если они не попали в вывод.
-    MANUAL_ADDITIONS = {
-        "PyQt6":                    "PyQt6>=6.4",
-        "packaging":                "packaging>=23.0",   # нужен updater.py
-        "opuslib":                  "opuslib",
-        "sounddevice":              "sounddevice",
-        "numpy":                    "numpy",
-        "pygame":                   "pygame",
-        "py7zr":                    "py7zr>=0.20",       # нужен updater.py (распаковка .7z)
-        "opencv-python-headless":   "opencv-python-headless",  # нужен dxcam внутри себя
-        # pipreqs не видит "import py7zr" внутри try/except — добавляем вручную
-    }
-
     with open(output_file, "r", encoding="utf-8") as f:
         content = f.read()
 
@@ -120,6 +149,10 @@ def main():
             for line in additions:
                 f.write(line + "\n")
 
+    with open(stamp_file, "w", encoding="utf-8") as f:
+        json.dump({"file_count": file_count, "manual_additions": MANUAL_ADDITIONS},
+                  f, ensure_ascii=False, indent=2)
+
     print("[make_requirements] ✅ requirements.txt готов:")
     with open(output_file, "r", encoding="utf-8") as f:
         print(f.read())
@@ -0,0 +1,167 @@
+"""
+Сетевые утилиты, общие для клиента (network_engine) и сервера (server):
+настройка UDP-сокетов и привязка потоков к ядрам. Константы и разбор
+переменных окружения для них — в config.py.
+"""
+import ctypes
+import os
+import socket
+import sys
+
+from config import get_udp_buffers, UDP_NO_CHECK_ENABLED
+
+
+# ── Привязка потоков к ядрам ─────────────────────────────────────────────────
+# PULSECHAT_AFFINITY="recv=0,send=1,enc=2": приём UDP, отправка (pacing +
+# аудио-сендер) и видео-энкодер держатся на своих ядрах — пул пакетов и
+# буферы не прыгают между кэшами ядер. По умолчанию не задано: планировщик
+# ОС сам раскладывает потоки (на macOS API привязки нет).
+def _parse_affinity(spec):
+    result = {}
+    for item in spec.split(","):
+        role, sep, core = item.partition("=")
+        if not sep:
+            continue
+        try:
+            result[role.strip()] = int(core)
+        except ValueError:
+            print(f"[Config] PULSECHAT_AFFINITY: некорректное ядро в '{item}'")
+    return result
+
+
+THREAD_AFFINITY = _parse_affinity(os.environ.get("PULSECHAT_AFFINITY", ""))
+
+
+def set_thread_affinity(role):
+    """ Привязывает ТЕКУЩИЙ поток к ядру из THREAD_AFFINITY[role]; True — если привязан """
+    core = THREAD_AFFINITY.get(role)
+    if core is None:
+        return False
+    try:
+        if sys.platform.startswith("linux"):
+            os.sched_setaffinity(0, {core})        # 0 — вызывающий поток
+        elif sys.platform == "win32":
+            k32 = ctypes.windll.kernel32
+            k32.GetCurrentThread.restype = ctypes.c_void_p
+            k32.SetThreadAffinityMask.argtypes = [ctypes.c_void_p, ctypes.c_size_t]
+            if not k32.SetThreadAffinityMask(k32.GetCurrentThread(), 1 << core):
+                raise OSError("SetThreadAffinityMask failed")
+        else:
+            return False
+    except (OSError, ValueError) as e:
+        print(f"[Config] Не удалось привязать поток '{role}' к ядру {core}: {e}")
+        return False
+    return True
+
+
+# ── Размер буферов UDP-сокета ────────────────────────────────────────────────
+# Запрошенный размер (config.get_udp_buffers) ограничен ядром
+# (net.core.rmem_max / wmem_max) — подбираем максимум, который ядро выдаёт.
+_UDP_BUF_PROBE_START = 256 * 1024
+_SO_RCVBUFFORCE = 33   # <asm-generic/socket.h>, требует CAP_NET_ADMIN
+_SO_SNDBUFFORCE = 32
+
+
+def _grow_sock_buffer(sock, opt, force_opt, target):
+    """ Удваивает буфер до target, пока ядро соглашается; возвращает фактический размер """
+    scale = 1.15 if sys.platform == "darwin" else 1.0   # BSD учитывает служебные данные
+    # Linux возвращает удвоенное значение (половина — под служебные структуры)
+    div   = 2 if sys.platform.startswith("linux") else 1
+
+    def _read():
+        return sock.getsockopt(socket.SOL_SOCKET, opt) // div
+
+    probe = min(_UDP_BUF_PROBE_START, target)
+    while True:
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, opt, int(probe * scale))
+        except OSError:
+            break   # EINVAL / ENOBUFS — предел достигнут, оставляем предыдущий
+        # Ядро выдало меньше запрошенного — упёрлись в rmem_max / wmem_max
+        if _read() < probe or probe >= target:
+            break
+        probe = min(probe * 2, target)
+    effective = _read()
+    if effective < target and sys.platform.startswith("linux"):
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, force_opt, target)
+            effective = _read()
+        except OSError:
+            pass    # нет CAP_NET_ADMIN
+    return effective
+
+
+def apply_udp_buffers(sock, rcv=None, snd=None, tag="Net"):
+    """ Выставляет SO_RCVBUF / SO_SNDBUF UDP-сокета (по умолчанию из get_udp_buffers) """
+    env_rcv, env_snd = get_udp_buffers()
+    rcv = env_rcv if rcv is None else rcv
+    snd = env_snd if snd is None else snd
+    eff_rcv = _grow_sock_buffer(sock, socket.SO_RCVBUF, _SO_RCVBUFFORCE, rcv) if rcv else 0
+    eff_snd = _grow_sock_buffer(sock, socket.SO_SNDBUF, _SO_SNDBUFFORCE, snd) if snd else 0
+    print(f"[{tag}] UDP buffers: rcv {eff_rcv // 1024} KB (req {rcv // 1024}), "
+          f"snd {eff_snd // 1024} KB (req {snd // 1024})")
+    return eff_rcv, eff_snd
+
+
+# ── Привязка приёма к ядру ───────────────────────────────────────────────────
+_SO_INCOMING_CPU = 49   # <asm-generic/socket.h>, Linux ≥ 3.19
+
+
+def set_incoming_cpu(sock, role="recv", tag="Net"):
+    """
+    Linux: SO_INCOMING_CPU = ядро потока role из THREAD_AFFINITY — подсказка
+    ядру обрабатывать датаграммы сокета на том же CPU, где их читает поток
+    приёма (skb и буфер приёма в одном L1/L2). Без PULSECHAT_AFFINITY — no-op.
+    """
+    core = THREAD_AFFINITY.get(role)
+    if core is None or not sys.platform.startswith("linux"):
+        return False
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, getattr(socket, "SO_INCOMING_CPU", _SO_INCOMING_CPU), core)
+    except OSError as e:
+        print(f"[{tag}] SO_INCOMING_CPU={core} не принят: {e}")
+        return False
+    return True
+
+
+# ── Windows: ICMP «port unreachable» на UDP ─────────────────────────────────
+# ICMP «port unreachable» в ответ на отправленную датаграмму
+# (собеседник/сервер закрыл порт) превращается в WSAECONNRESET на следующем
+# recv/recvfrom того же сокета — приём прерывается исключением на ровном месте.
+# SIO_UDP_CONNRESET = FALSE отключает это поведение.
+_SIO_UDP_CONNRESET = 0x9800000C
+
+
+def disable_udp_connreset(sock, tag="Net") -> bool:
+    """ Windows: выключает WSAECONNRESET на UDP-сокете от ICMP port unreachable """
+    if sys.platform != "win32":
+        return False
+    from ctypes import wintypes   # только Windows
+    ws2 = ctypes.windll.ws2_32
+    ws2.WSAIoctl.argtypes = [ctypes.c_size_t, wintypes.DWORD, ctypes.c_void_p, wintypes.DWORD,
+                             ctypes.c_void_p, wintypes.DWORD, ctypes.POINTER(wintypes.DWORD),
+                             ctypes.c_void_p, ctypes.c_void_p]
+    flag     = wintypes.BOOL(False)
+    returned = wintypes.DWORD(0)
+    if ws2.WSAIoctl(sock.fileno(), _SIO_UDP_CONNRESET, ctypes.byref(flag), ctypes.sizeof(flag),
+                    None, 0, ctypes.byref(returned), None, None) != 0:
+        print(f"[{tag}] SIO_UDP_CONNRESET failed: WSA error {ws2.WSAGetLastError()}")
+        return False
+    return True
+
+
+# ── Linux: UDP без контрольной суммы (config.UDP_NO_CHECK_ENABLED) ───────────
+_SO_NO_CHECK = 11   # <asm-generic/socket.h>
+
+
+def disable_udp_checksum(sock, tag="Net") -> bool:
+    """ SO_NO_CHECK на UDP-сокете, если включён UDP_NO_CHECK_ENABLED (только Linux) """
+    if not (UDP_NO_CHECK_ENABLED and sys.platform.startswith("linux")):
+        return False
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, getattr(socket, "SO_NO_CHECK", _SO_NO_CHECK), 1)
+    except OSError as e:
+        print(f"[{tag}] SO_NO_CHECK unavailable: {e}")
+        return False
+    print(f"[{tag}] UDP checksums disabled for outgoing packets (SO_NO_CHECK)")
+    return True
@@ -1,6 +1,5 @@
 import socket
 import threading
-import json
 import time
 import queue
 import io
@@ -12,16 +11,35 @@ import struct
 import os
 import platform
 import ctypes
+import sys
+import errno
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from dataclasses import dataclass
 
 from PyQt6.QtCore import QObject, pyqtSignal, QSettings
 
 from config import (
-    resource_path, DEFAULT_PORT_TCP, DEFAULT_PORT_UDP, BUFFER_SIZE,
-    UDP_HEADER_STRUCT, UDP_HEADER_SIZE, FLAG_VIDEO, FLAG_STREAM_AUDIO, MAX_VIDEO_PAYLOAD,
+    resource_path, DEFAULT_PORT_TCP, DEFAULT_PORT_UDP, new_recv_buffer,
+    UDP_NO_CHECK_ENABLED,
+    UDP_HEADER_PACK, UDP_HEADER_PACK_INTO, UDP_HEADER_UNPACK_FROM,
+    UDP_HEADER_TS_OFFSET, UDP_HEADER_FLAGS_OFFSET, UDP_TS_PACK_INTO,
+    UDP_HEADER_SEQ_OFFSET, UDP_SEQ_PACK_INTO,
+    UDP_HEADER_SIZE, FLAG_VIDEO, FLAG_STREAM_AUDIO, MAX_VIDEO_PAYLOAD,
+    VIDEO_CHUNK_PACK, VIDEO_CHUNK_PACK_INTO, VIDEO_HEADER_SIZE, VIDEO_PACKET_SLOT_SIZE,
+    IP_UDP_OVERHEAD, MIN_VIDEO_PAYLOAD, MAX_VIDEO_PAYLOAD_JUMBO, JUMBO_VIDEO_ENABLED,
     CMD_SOUNDBOARD, FLAG_LOOPBACK_AUDIO, FLAG_STREAM_VOICES,
-    STREAM_VOICE_HEADER_STRUCT, STREAM_VOICE_HEADER_SIZE,
-    VIDEO_PACING_RATE_BYTES_SEC, FLAG_WHISPER,
+    STREAM_VOICE_UNPACK_FROM, STREAM_VOICE_HEADER_SIZE,
+    VIDEO_PACING_RATE_BYTES_SEC, VIDEO_PACING_BURST, KERNEL_PACING_ENABLED, FLAG_WHISPER,
+    BUSY_PACING_ENABLED,
     CMD_NUDGE_VOTE, CMD_PLAY_NUDGE, CMD_NUDGE_TRIGGERED, NUDGE_SOUND_PATH,
+    TCP_FRAME_HEADER_SIZE, TCP_FRAME_UNPACK_FROM, MAX_TCP_FRAME, pack_frame,
+    json_dumps, json_loads,
+)
+from net_utils import (
+    apply_udp_buffers, set_incoming_cpu, set_thread_affinity, disable_udp_connreset,
+    disable_udp_checksum,
 )
 
 MAX_SILENT_RECONNECT_ATTEMPTS = 4
@@ -37,6 +55,358 @@ if platform.system() == "Windows":
         pass
 
 
+# ── sendmmsg (Linux): несколько UDP-пакетов за один системный вызов ──────────
+# В stdlib Python sendmmsg нет — вызываем libc через ctypes.
+# На Windows / macOS _SENDMMSG = None и _send_batch шлёт пакеты по одному send().
+VIDEO_SEND_BATCH_MAX = 32
+AUDIO_SEND_BATCH_MAX = 32
+
+# recvmmsg: до UDP_RECV_BATCH_MAX датаграмм за один вызов в udp_receive_loop.
+# Слот 9216 байт вмещает jumbo-кадр (MTU 9000); датаграмма крупнее слота
+# приходит с MSG_TRUNC и отбрасывается.
+UDP_RECV_BATCH_MAX = 64
+_RECV_SLOT_SIZE    = 9216
+_MSG_WAITFORONE    = 0x10000
+_MSG_TRUNC         = 0x20
+
+_SENDMMSG = None
+_RECVMMSG = None
+if sys.platform.startswith("linux"):
+    try:
+        _libc = ctypes.CDLL(None, use_errno=True)
+        _SENDMMSG = _libc.sendmmsg
+        _RECVMMSG = _libc.recvmmsg
+    except (OSError, AttributeError):
+        _SENDMMSG = _RECVMMSG = None
+
+if _SENDMMSG is not None:
+    class _IoVec(ctypes.Structure):
+        _fields_ = [("iov_base", ctypes.c_void_p), ("iov_len", ctypes.c_size_t)]
+
+    class _MsgHdr(ctypes.Structure):
+        _fields_ = [
+            ("msg_name",       ctypes.c_void_p),
+            ("msg_namelen",    ctypes.c_uint32),
+            ("msg_iov",        ctypes.POINTER(_IoVec)),
+            ("msg_iovlen",     ctypes.c_size_t),
+            ("msg_control",    ctypes.c_void_p),
+            ("msg_controllen", ctypes.c_size_t),
+            ("msg_flags",      ctypes.c_int),
+        ]
+
+    class _MMsgHdr(ctypes.Structure):
+        _fields_ = [("msg_hdr", _MsgHdr), ("msg_len", ctypes.c_uint)]
+
+    _SENDMMSG.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int]
+    _SENDMMSG.restype  = ctypes.c_int
+    _RECVMMSG.argtypes = [ctypes.c_int, ctypes.POINTER(_MMsgHdr), ctypes.c_uint, ctypes.c_int,
+                          ctypes.c_void_p]
+    _RECVMMSG.restype  = ctypes.c_int
+
+    class _SendBatch:
+        """
+        Заранее собранные mmsghdr/iovec под sendmmsg — по одному объекту на
+        поток-отправитель. UDP-сокет подключён к серверу (connect), поэтому
+        msg_name не заполняется — адресата знает ядро.
+        """
+
+        def __init__(self, count: int):
+            self.count = count
+            self._iovs = (_IoVec * count)()
+            self._msgs = (_MMsgHdr * count)()
+            for i in range(count):
+                hdr = self._msgs[i].msg_hdr
+                hdr.msg_iov    = ctypes.pointer(self._iovs[i])
+                hdr.msg_iovlen = 1
+
+        def send(self, sock, packets) -> int:
+            """ sendmmsg() до count пакетов; возвращает число принятых ядром """
+            n    = min(len(packets), self.count)
+            iovs = self._iovs
+            bufs = [_buffer_ref(packets[i]) for i in range(n)]  # держим ссылки до возврата
+            for i in range(n):
+                iovs[i].iov_base = ctypes.addressof(bufs[i])
+                iovs[i].iov_len  = len(packets[i])
+            sent = _SENDMMSG(sock.fileno(), self._msgs, n, 0)
+            return sent if sent > 0 else 0
+
+
+def _buffer_ref(pkt):
+    """ctypes-объект поверх данных пакета без копирования (bytes или слот PacketPool)."""
+    if isinstance(pkt, bytes):
+        return ctypes.c_char.from_address(ctypes.cast(ctypes.c_char_p(pkt), ctypes.c_void_p).value)
+    return ctypes.c_char.from_buffer(pkt)
+
+
+class _RecvBatch:
+    """
+    Заранее подготовленные буферы и mmsghdr под recvmmsg (Linux).
+
+    Один bytearray на все слоты; iovec каждого mmsghdr указывает на свой
+    слот. Массивы ctypes собираются один раз — на каждый вызов recv() только
+    системный вызов, без аллокаций. datagram(i) — memoryview на данные слота,
+    валидный до следующего recv().
+    """
+
+    def __init__(self, count: int = UDP_RECV_BATCH_MAX, slot_size: int = _RECV_SLOT_SIZE):
+        self.count     = count
+        self.slot_size = slot_size
+        self._buf      = bytearray(count * slot_size)
+        self._mv       = memoryview(self._buf)
+        self._base_ref = ctypes.c_char.from_buffer(self._buf)   # держит адрес буфера
+        base           = ctypes.addressof(self._base_ref)
+        self._iovs     = (_IoVec * count)()
+        self._msgs     = (_MMsgHdr * count)()
+        for i in range(count):
+            self._iovs[i].iov_base = base + i * slot_size
+            self._iovs[i].iov_len  = slot_size
+            hdr = self._msgs[i].msg_hdr
+            hdr.msg_iov    = ctypes.pointer(self._iovs[i])
+            hdr.msg_iovlen = 1
+
+    def recv(self, fd: int) -> int:
+        """
+        Блокируется до первой датаграммы, затем забирает всё, что уже лежит
+        в очереди сокета (MSG_WAITFORONE), но не больше count. GIL на время
+        вызова отпущен (ctypes).
+        """
+        n = _RECVMMSG(fd, self._msgs, self.count, _MSG_WAITFORONE, None)
+        if n < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+        return n
+
+    def datagram(self, i: int):
+        """memoryview i-й датаграммы или None, если она обрезана (MSG_TRUNC)."""
+        msg = self._msgs[i]
+        if msg.msg_hdr.msg_flags & _MSG_TRUNC:
+            return None
+        start = i * self.slot_size
+        return self._mv[start:start + msg.msg_len]
+
+
+# Последний вывод по ключу для _print_throttled
+_last_print: dict = {}
+
+
+def _print_throttled(key: str, msg: str, interval: float = 5.0):
+    """
+    print не чаще раза в interval секунд на ключ. Для горячих путей (приём,
+    pacing): при потоке ошибок/пакетов print с его локом stdout и flush в
+    консоль сам начинает тормозить поток и ронять пакеты.
+    """
+    now = time.monotonic()
+    if now - _last_print.get(key, -interval) >= interval:
+        _last_print[key] = now
+        print(msg)
+
+
+@lru_cache(maxsize=32)
+def _load_panel_sound(path: str):
+    """
+    Декодированный звук из assets/panel/ — (data, samplerate).
+    Стандартные звуки повторяются постоянно: файл читается и декодируется
+    один раз. Массив только читается (play получает data * vol — копию).
+    """
+    data, sr = sf.read(path, dtype='float32')
+    data.flags.writeable = False
+    return data, sr
+
+
+def _preload_panel_sounds():
+    """
+    Прогревает кэш _load_panel_sound всеми файлами assets/panel/ — первый
+    клик по кнопке soundboard играет сразу, без чтения и декодирования.
+    Путь собирается так же, как в play_soundboard_file (тот же ключ кэша).
+    """
+    try:
+        names = os.listdir(resource_path("assets/panel"))
+    except OSError as e:
+        print(f"[Net] Soundboard preload skipped: {e}")
+        return
+    for name in names:
+        try:
+            _load_panel_sound(resource_path(os.path.join("assets/panel", name)))
+        except Exception as e:
+            print(f"[Net] Soundboard preload error ({name}): {e}")
+
+
+class PacketPool:
+    """
+    Пул заранее выделенных слотов под исходящие видео-пакеты.
+
+    Один bytearray на весь пул, слоты — memoryview-срезы. Отправитель пишет
+    заголовки через pack_into и копирует payload прямо в слот — без
+    промежуточных bytes и конкатенаций на каждый пакет. Слот возвращается
+    в пул после send() (или при дропе из переполненной очереди).
+    deque.append / popleft атомарны под GIL — отдельный лок не нужен.
+    """
+
+    def __init__(self, slot_size: int, count: int):
+        self.slot_size = slot_size
+        self._buf   = bytearray(slot_size * count)
+        mv          = memoryview(self._buf)
+        self._slots = [mv[i * slot_size:(i + 1) * slot_size] for i in range(count)]
+        self._free  = deque(range(count))
+
+    def acquire(self):
+        """Индекс свободного слота или None, если пул исчерпан."""
+        try:
+            return self._free.popleft()
+        except IndexError:
+            return None
+
+    def view(self, idx: int) -> memoryview:
+        return self._slots[idx]
+
+    def release(self, idx):
+        if idx is not None:
+            self._free.append(idx)
+
+
+# <asm-generic/socket.h>; в модуле socket константы нет
+_SO_MAX_PACING_RATE = 47
+
+
+def _enable_kernel_pacing(sock, rate_bytes_sec: int) -> bool:
+    """
+    Просит ядро ограничить скорость сокета (SO_MAX_PACING_RATE). Реально
+    пакеты растягивает qdisc fq — без неё опция принимается, но не действует,
+    поэтому режим включается только явно (KERNEL_PACING_ENABLED).
+    """
+    if not (KERNEL_PACING_ENABLED and sys.platform.startswith('linux')):
+        return False
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, _SO_MAX_PACING_RATE, rate_bytes_sec)
+    except OSError as e:
+        print(f"[Net] SO_MAX_PACING_RATE unavailable ({e}), user-space pacing")
+        return False
+    print(f"[Net] Kernel pacing: {rate_bytes_sec} B/s (требуется qdisc fq)")
+    return True
+
+
+# Предел pacing-очереди видео: ~2.7 сек буфера при 720p60 6Mbps (737 пакетов/сек)
+VIDEO_PACING_QUEUE_MAX = 2000
+
+# Общий байтовый бюджет пула слотов: при jumbo-payload слотов меньше,
+# но памяти столько же (~2.7 MB), сколько при MAX_VIDEO_PAYLOAD.
+VIDEO_POOL_BYTES = VIDEO_PACING_QUEUE_MAX * VIDEO_PACKET_SLOT_SIZE
+
+
+@dataclass
+class NetParams:
+    """Параметры транспорта, выбранные при подключении (общие для net и video)."""
+    max_payload: int = MAX_VIDEO_PAYLOAD
+    path_mtu:    int = 0           # MTU маршрута до сервера; 0 — неизвестен
+
+
+# ── MTU маршрута до сервера (Linux) ──────────────────────────────────────────
+# Константы из <linux/in.h>; в модуле socket есть не во всех сборках Python.
+_IP_MTU_DISCOVER = getattr(socket, 'IP_MTU_DISCOVER', 10)
+_IP_PMTUDISC_DO  = getattr(socket, 'IP_PMTUDISC_DO', 2)
+_IP_MTU          = getattr(socket, 'IP_MTU', 14)
+
+
+def route_mtu(host: str, port: int) -> int:
+    """
+    MTU маршрута до host или 0, если узнать нельзя (не Linux, ошибка).
+
+    connect() UDP-сокета ничего не отправляет — ядро только выбирает маршрут,
+    и IP_MTU возвращает MTU исходящего интерфейса (или меньший PMTU, если он
+    уже закэширован по ICMP). Это НЕ измеренный path MTU: дальше по пути
+    (PPPoE, VPN) и у зрителей он может быть меньше — поэтому значение только
+    ограничивает чанк сверху, а вырасти выше MAX_VIDEO_PAYLOAD он может лишь
+    с явным PULSECHAT_JUMBO_VIDEO=1.
+    """
+    if not sys.platform.startswith('linux'):
+        return 0
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.setsockopt(socket.IPPROTO_IP, _IP_MTU_DISCOVER, _IP_PMTUDISC_DO)
+        s.connect((host, port))
+        return s.getsockopt(socket.IPPROTO_IP, _IP_MTU)
+    except OSError as e:
+        print(f"[Net] Route MTU unavailable: {e}")
+        return 0
+    finally:
+        s.close()
+
+
+# ── UDP GSO (Linux ≥ 4.18): ядро само режет буфер на датаграммы ──────────────
+# Одна sendmsg() с cmsg UDP_SEGMENT = размер сегмента: стек проходится один
+# раз на всю пачку, а не на каждый пакет. Условия ядра: все сегменты, кроме
+# последнего, одного размера; не больше 64 сегментов и ~64 KB на вызов.
+_UDP_SEGMENT      = getattr(socket, 'UDP_SEGMENT', 103)
+_GSO_SEG_STRUCT   = struct.Struct("=H")
+_GSO_MAX_SEGMENTS = 64
+_GSO_MAX_BYTES    = 65000
+_gso_enabled      = sys.platform.startswith('linux') and hasattr(socket.socket, 'sendmsg')
+
+
+def _send_gso(sock, packets) -> bool:
+    """
+    Отправляет пачку одним GSO-вызовом. False — пачка не подходит под условия
+    GSO (или ядро/драйвер его не поддерживает), вызывающий шлёт обычным путём.
+    Пакеты передаются списком буферов (scatter-gather) — без склейки в bytes.
+    """
+    global _gso_enabled
+    n   = len(packets)
+    seg = len(packets[0])
+    if n > _GSO_MAX_SEGMENTS or len(packets[-1]) > seg or seg * n > _GSO_MAX_BYTES:
+        return False
+    for i in range(1, n - 1):
+        if len(packets[i]) != seg:
+            return False
+    try:
+        ancdata = [(socket.IPPROTO_UDP, _UDP_SEGMENT, _GSO_SEG_STRUCT.pack(seg))]
+        sock.sendmsg(packets, ancdata)
+    except OSError as e:
+        if e.errno in (errno.EIO, errno.EINVAL, errno.ENOPROTOOPT, errno.EOPNOTSUPP):
+            _gso_enabled = False
+            print(f"[Net] UDP GSO unavailable ({e}), using sendmmsg")
+            return False
+        raise
+    return True
+
+
+def _probe_gso(sock):
+    """
+    Проверка поддержки GSO при подключении: getsockopt(UDP_SEGMENT) на ядрах
+    < 4.18 даёт ENOPROTOOPT — тогда GSO выключается сразу, а не после первой
+    неудачной пачки видео.
+    """
+    global _gso_enabled
+    if not _gso_enabled:
+        return
+    try:
+        sock.getsockopt(socket.IPPROTO_UDP, _UDP_SEGMENT)
+    except OSError as e:
+        _gso_enabled = False
+        print(f"[Net] UDP GSO unavailable ({e}), using sendmmsg")
+
+
+def _new_send_batch(count: int):
+    """_SendBatch для потока-отправителя или None, если sendmmsg недоступен."""
+    return _SendBatch(count) if _SENDMMSG is not None else None
+
+
+def _send_batch(sock, packets, mm=None):
+    """
+    Отправляет список пакетов в подключённый к серверу UDP-сокет.
+    Возвращает число отправленных.
+    Linux: пачка из полных видео-чанков (+ хвост кадра) — одним GSO-вызовом,
+    иначе один sendmmsg() через mm (_SendBatch потока; остаток при частичной
+    отправке — по одному). Windows / macOS (mm=None) — цикл send().
+    """
+    n = len(packets)
+    if n >= 2 and _gso_enabled and _send_gso(sock, packets):
+        return n
+    sent = mm.send(sock, packets) if (mm is not None and n >= 2) else 0
+    for pkt in packets[sent:]:
+        sock.send(pkt)
+    return n
+
+
 class NetworkClient(QObject):
     connected           = pyqtSignal(dict)
     global_state_update = pyqtSignal(dict)
@@ -63,6 +433,10 @@ class NetworkClient(QObject):
         self.server_addr  = None
         self.running      = False
         self.current_ping = 0
+        self._ping_initialized = False
+        # Кольцо отправленных пингов: слот seq & PING_RING_MASK → (seq, perf_counter_ns)
+        self._ping_seq  = 0
+        self._ping_ring = [(-1, 0)] * (self.PING_RING_MASK + 1)
         self.packets_sent = 0
         self.packets_received = 0
 
@@ -78,14 +452,31 @@ class NetworkClient(QObject):
         # Используется для блокировки спама: новый звук не запустится,
         # пока текущий ещё играет.
         self._sb_playing = threading.Event()
+        self._sb_lock    = threading.Lock()
+        # Загрузка и воспроизведение soundboard — вне TCP-потока
+        self._sfx_pool   = ThreadPoolExecutor(max_workers=2, thread_name_prefix='sfx')
+        self._sfx_pool.submit(_preload_panel_sounds)
 
         # -------------------------------------------------------------------
         # Pacing-очередь для видео-пакетов (leaky bucket).
         # Пакеты кладёт send_video_packet(), дренирует video_pacing_loop().
-        # maxsize=2000: ~2.7 сек буфера при 720p60 6Mbps (737 пакетов/сек).
-        # Если очередь заполнена — старые пакеты дропаются (актуальность важнее).
+        # Предел VIDEO_PACING_QUEUE_MAX; при переполнении старые пакеты
+        # дропаются (актуальность важнее).
+        # deque + Event вместо queue.Queue: append/popleft атомарны под GIL,
+        # лок берётся только на пробуждение спящего потока, а не на каждый пакет.
         # -------------------------------------------------------------------
-        self.video_pacing_queue = queue.Queue(maxsize=2000)
+        self.video_pacing_queue = deque()
+        self._video_evt         = threading.Event()
+        # Размер видео-чанка: MAX_VIDEO_PAYLOAD, при подключении уточняется
+        # по MTU маршрута до сервера (_apply_path_mtu).
+        self.net_params  = NetParams()
+        self._kernel_pacing = False   # True — скорость держит qdisc fq (Linux)
+        self._video_pool = self._make_video_pool(MAX_VIDEO_PAYLOAD)
+
+        # flags (0..255) → обработчик UDP-пакета (циклы udp_receive_loop)
+        self._flag_handlers = self._build_flag_handlers()
+        # action → обработчик TCP-сообщения сервера (process_message)
+        self._tcp_handlers  = self._build_tcp_handlers()
 
         self._init_sockets()
 
@@ -107,6 +498,9 @@ class NetworkClient(QObject):
         try:
             self.tcp_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
             self.tcp_sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            # Команды короткие и чувствительны к задержке (mute/whisper/nudge) —
+            # без Nagle они не ждут ACK предыдущего сегмента.
+            self.tcp_sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
             self.udp_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
             self.udp_socket_bound = False
         except Exception as e:
@@ -128,13 +522,18 @@ class NetworkClient(QObject):
                    сразу, до фонового воспроизведения — MainWindow покажет тост.
 
         Защита от спама: новый звук НЕ запускается, пока предыдущий ещё играет.
+
+        Вызывается в пуле _sfx_pool (см. process_message): base64, чтение
+        файла и sd.wait() не задерживают TCP-поток с sync_users.
         """
-        try:
-            # Anti-spam: блокируем, пока текущий звук ещё играет
+        # Anti-spam: блокируем, пока текущий звук ещё играет.
+        # Флаг снимается в finally — в том числе при раннем return ниже.
+        with self._sb_lock:
             if self._sb_playing.is_set():
                 print(f"[Net] Soundboard: пропущен {filename!r} — звук ещё играет")
                 return
-
+            self._sb_playing.set()
+        try:
             raw = int(QSettings("MyVoiceChat", "GlobalSettings").value("soundboard_volume", 40)) / 100.0
             vol = raw ** 2  # квадратичная кривая: (raw/100)^2
 
@@ -164,21 +563,17 @@ class NetworkClient(QObject):
             if from_nick:
                 self.soundboard_played.emit(from_nick)
 
-            def _play():
-                try:
-                    self._sb_playing.set()
-                    data, sr = sf.read(audio_source, dtype='float32')
-                    sd.play(data * vol, sr)
-                    sd.wait()
-                except Exception as e:
-                    print(f"[Net] Soundboard playback error: {e}")
-                finally:
-                    self._sb_playing.clear()
-
-            threading.Thread(target=_play, daemon=True, name="soundboard-play").start()
-            print(f"[Net] Playing soundboard: {filename} (vol={vol:.3f}, custom={bool(data_b64)}, by={from_nick!r})")
+            try:
+                data, sr = sf.read(audio_source, dtype='float32') if data_b64 else _load_panel_sound(audio_source)
+                print(f"[Net] Playing soundboard: {filename} (vol={vol:.3f}, custom={bool(data_b64)}, by={from_nick!r})")
+                sd.play(data * vol, sr)
+                sd.wait()
+            except Exception as e:
+                print(f"[Net] Soundboard playback error: {e}")
         except Exception as e:
             print(f"[Net] Soundboard error: {e}")
+        finally:
+            self._sb_playing.clear()
 
     # ------------------------------------------------------------------
     # Подключение к серверу
@@ -201,8 +596,46 @@ class NetworkClient(QObject):
             self.connection_lost.emit()
             self._reconnect_loop()
 
+    @staticmethod
+    def _make_video_pool(max_payload: int) -> 'PacketPool':
+        slot_size = UDP_HEADER_SIZE + VIDEO_HEADER_SIZE + max_payload
+        # Слоты под пакеты из очереди + запас на пачку, которая сейчас
+        # отправляется (уже вынута из очереди, но слоты ещё не возвращены).
+        count = (min(VIDEO_PACING_QUEUE_MAX, VIDEO_POOL_BYTES // slot_size)
+                 + VIDEO_SEND_BATCH_MAX + 1)
+        return PacketPool(slot_size, count)
+
+    def _apply_path_mtu(self):
+        """
+        Выбирает размер видео-чанка по MTU маршрута до сервера (route_mtu):
+        максимум, при котором [IP+UDP][UDP header][VIDEO header][payload]
+        не фрагментируется, но не больше MAX_VIDEO_PAYLOAD — тот же пакет
+        сервер шлёт зрителям по их путям, о MTU которых клиент ничего не
+        знает. Потолок MAX_VIDEO_PAYLOAD_JUMBO — только с PULSECHAT_JUMBO_VIDEO=1.
+        Вызывается до запуска потоков — очередь и пул ещё никто не трогает.
+        """
+        mtu     = route_mtu(self._ip, DEFAULT_PORT_UDP)
+        ceiling = MAX_VIDEO_PAYLOAD_JUMBO if JUMBO_VIDEO_ENABLED else MAX_VIDEO_PAYLOAD
+        if mtu <= 0:
+            payload = MAX_VIDEO_PAYLOAD
+        else:
+            payload = mtu - IP_UDP_OVERHEAD - UDP_HEADER_SIZE - VIDEO_HEADER_SIZE
+            payload = max(MIN_VIDEO_PAYLOAD, min(payload, ceiling))
+
+        params = self.net_params
+        params.path_mtu = mtu
+        if payload != params.max_payload:
+            # Пакеты старого размера из прошлой сессии больше не нужны
+            self.video_pacing_queue.clear()
+            self._video_pool   = self._make_video_pool(payload)
+            params.max_payload = payload
+        print(f"[Net] Route MTU {mtu or 'n/a'} (jumbo={JUMBO_VIDEO_ENABLED}) → video payload {payload} B")
+
     def _do_connect(self):
         self.server_addr = (self._ip, DEFAULT_PORT_UDP)
+        self._ping_initialized = False   # новый сервер / маршрут — EWMA с нуля
+        self._ping_ring = [(-1, 0)] * (self.PING_RING_MASK + 1)
+        self._apply_path_mtu()
 
         self.tcp_sock.settimeout(5.0)
         self.tcp_sock.connect((self._ip, DEFAULT_PORT_TCP))
@@ -218,12 +651,28 @@ class NetworkClient(QObject):
                 print(f"[Net] CRITICAL: UDP bind failed: {e}")
                 raise
 
+        # Подключённый UDP-сокет: адрес сервера разрешается и запоминается
+        # ядром один раз — дальше send()/recv_into() без адреса на каждый пакет,
+        # а датаграммы с чужих адресов ядро отбрасывает само.
+        self.udp_sock.connect(self.server_addr)
+
         # 8 MB буфер приёма: при 6Mbps видео ≈ 750KB/s → запас ~10 сек.
+        # Размеры переопределяются PULSECHAT_UDP_RCV / PULSECHAT_UDP_SND.
         try:
-            self.udp_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 8 * 1024 * 1024)
-            print("[Net] UDP receive buffer set to 8MB")
-        except Exception:
-            pass
+            apply_udp_buffers(self.udp_sock)
+        except Exception as e:
+            print(f"[Net] UDP buffer setup failed: {e}")
+        self._kernel_pacing = _enable_kernel_pacing(self.udp_sock, VIDEO_PACING_RATE_BYTES_SEC)
+        disable_udp_connreset(self.udp_sock)
+        _probe_gso(self.udp_sock)
+        # SO_NO_CHECK и UDP_SEGMENT несовместимы (EINVAL на каждой GSO-пачке,
+        # _send_gso выключил бы GSO молча) — при доступном GSO побеждает GSO.
+        if UDP_NO_CHECK_ENABLED and _gso_enabled:
+            print("[Net] PULSECHAT_UDP_NO_CHECK ignored: UDP GSO in use "
+                  "(kernel rejects UDP_SEGMENT with SO_NO_CHECK)")
+        else:
+            disable_udp_checksum(self.udp_sock)
+        set_incoming_cpu(self.udp_sock)
 
         self.send_json({"action": "login", "nick": self._nick, "avatar": self._avatar})
         self.running       = True
@@ -231,9 +680,8 @@ class NetworkClient(QObject):
 
         threading.Thread(target=self.tcp_listen,          daemon=True).start()
         threading.Thread(target=self.udp_sender_loop,     daemon=True).start()
-        threading.Thread(target=self.udp_keepalive_loop,  daemon=True).start()
+        threading.Thread(target=self.udp_timer_loop,      daemon=True).start()
         threading.Thread(target=self.udp_receive_loop,    daemon=True).start()
-        threading.Thread(target=self.ping_loop,           daemon=True).start()
         threading.Thread(target=self.video_pacing_loop,   daemon=True).start()
 
         print("[Net] Connected to server")
@@ -241,12 +689,38 @@ class NetworkClient(QObject):
     # ------------------------------------------------------------------
     # Переподключение
     # ------------------------------------------------------------------
+    def stop_loops(self):
+        """ Останавливает рабочие потоки и будит udp_sender_loop из send_queue.get() """
+        self.running = False
+        send_q = self.audio.send_queue
+        try:
+            send_q.put_nowait(None)
+        except queue.Full:
+            # Очередь забита старыми пакетами — освобождаем место под сигнал
+            try:
+                send_q.get_nowait()
+                send_q.put_nowait(None)
+            except (queue.Empty, queue.Full):
+                pass
+
+    def shutdown(self):
+        """ Полная остановка при закрытии приложения (в отличие от stop_loops,
+        который зовётся и при переподключении). Прерывает текущий звук —
+        иначе sd.wait() в потоке _sfx_pool держит выход интерпретатора —
+        и гасит пул, отменяя ещё не начатые задачи (в т.ч. предзагрузку). """
+        self.stop_loops()
+        try:
+            sd.stop()
+        except Exception as e:
+            print(f"[Net] sd.stop error: {e}")
+        self._sfx_pool.shutdown(wait=False, cancel_futures=True)
+
     def _on_connection_lost(self):
         if self._reconnecting:
             return
         self._reconnecting       = True
         self._is_connected       = False
-        self.running             = False
+        self.stop_loops()
         self._reconnect_attempts = 0
 
         print("[Net] Connection lost. Starting reconnect loop...")
@@ -283,7 +757,7 @@ class NetworkClient(QObject):
         print("[Net] Manual reconnect requested.")
         self._reconnecting       = True
         self._reconnect_attempts = 0
-        self.running = False
+        self.stop_loops()
         threading.Thread(target=self._reconnect_loop, daemon=True).start()
 
     # ------------------------------------------------------------------
@@ -295,19 +769,61 @@ class NetworkClient(QObject):
     def send_video_packet(self, payload):
         if not self.server_addr or self.audio.my_uid == 0:
             return
-        header = UDP_HEADER_STRUCT.pack(self.audio.my_uid, time.time(), 0, FLAG_VIDEO)
-        packet = header + payload
+        # ts у видео никто не читает (ни сервер, ни VideoEngine) — пишем 0.0
+        # и не дёргаем часы на каждый фрагмент.
+        pool = self._video_pool
+        end  = UDP_HEADER_SIZE + len(payload)
+        slot = pool.acquire() if end <= pool.slot_size else None
+        if slot is None:
+            header = UDP_HEADER_PACK(self.audio.my_uid, 0.0, 0, FLAG_VIDEO)
+            self._enqueue_video(None, header + payload)
+            return
+        # Заголовок и payload пишутся прямо в слот пула — без header + payload
+        mv = pool.view(slot)
+        UDP_HEADER_PACK_INTO(mv, 0, self.audio.my_uid, 0.0, 0, FLAG_VIDEO)
+        mv[UDP_HEADER_SIZE:end] = payload
+        self._enqueue_video(slot, mv[:end])
+
+    def send_video_chunk(self, frame_id: int, chunk_idx: int, total_chunks: int, payload):
+        """
+        Собирает видео-пакет [UDP header][VIDEO_CHUNK header][payload] прямо
+        в слоте PacketPool (pack_into, без промежуточных bytes) и ставит
+        его в pacing-очередь. payload — bytes или memoryview-срез кадра.
+        """
+        if not self.server_addr or self.audio.my_uid == 0:
+            return
+        pool = self._video_pool
+        slot = pool.acquire()
+        if slot is None:
+            # Пул исчерпан (не должно случаться при размере очереди) — обычная сборка
+            self.send_video_packet(
+                VIDEO_CHUNK_PACK(frame_id, chunk_idx, total_chunks) + bytes(payload))
+            return
+        mv  = pool.view(slot)
+        off = UDP_HEADER_SIZE + VIDEO_HEADER_SIZE
+        end = off + len(payload)
+        UDP_HEADER_PACK_INTO(mv, 0, self.audio.my_uid, 0.0, 0, FLAG_VIDEO)
+        VIDEO_CHUNK_PACK_INTO(mv, UDP_HEADER_SIZE, frame_id, chunk_idx, total_chunks)
+        mv[off:end] = payload
+        self._enqueue_video(slot, mv[:end])
+
+    def _enqueue_video(self, slot, packet):
         # Если очередь переполнена — дропаем самый старый пакет, берём новый.
         # Актуальный кадр важнее давно стоящего в очереди.
-        if self.video_pacing_queue.full():
+        # deque(maxlen) не подходит: вытесненный элемент молча теряется
+        # вместе со своим слотом пула. Поэтому append, затем popleft лишнего —
+        # обе операции атомарны, гонка с video_pacing_loop даёт в худшем
+        # случае IndexError, а не потерю или двойной возврат слота.
+        q = self.video_pacing_queue
+        q.append((slot, packet))
+        if len(q) > VIDEO_PACING_QUEUE_MAX:
             try:
-                self.video_pacing_queue.get_nowait()
-            except queue.Empty:
+                self._video_pool.release(q.popleft()[0])
+            except IndexError:
                 pass
-        try:
-            self.video_pacing_queue.put_nowait(packet)
-        except queue.Full:
-            pass
+        evt = self._video_evt
+        if not evt.is_set():
+            evt.set()
 
     # ------------------------------------------------------------------
     # Leaky bucket pacing для видео-пакетов.
@@ -320,184 +836,413 @@ class NetworkClient(QObject):
     #
     # Решение (leaky bucket):
     #   Пакеты отправляются с постоянным интервалом ~1.4 мс, не превышая
-    #   VIDEO_PACING_RATE_BYTES_SEC. Burst'ы невозможны.
+    #   VIDEO_PACING_RATE_BYTES_SEC. Burst ограничен VIDEO_PACING_BURST
+    #   пакетами (~5 KB), которые уходят одним системным вызовом.
     #
     # Точность на Windows:
     #   timeBeginPeriod(1) уже вызван в этом файле → time.sleep() имеет
-    #   разрешение ~1 мс. Для sub-millisecond интервалов используем
-    #   perf_counter busy-wait с порогом 0.5 мс.
+    #   разрешение ~1 мс и проспать может на 0.5-1 мс больше. Ожидания
+    #   короче 2 мс — perf_counter busy-wait с sleep(0) (отдаёт GIL другим
+    #   потокам, не усыпляя на квант таймера), длиннее — sleep с запасом на
+    #   пересып и такой же busy-wait остатка.
+    #   PULSECHAT_BUSY_PACE=1 — всегда чистый busy-wait (BUSY_PACING_ENABLED).
     # ------------------------------------------------------------------
     def video_pacing_loop(self):
-        # Средний размер видео-пакета: MAX_VIDEO_PAYLOAD + UDP_HEADER(13) + VIDEO_HEADER(8)
-        avg_packet_bytes = MAX_VIDEO_PAYLOAD + 21
+        # Средний размер видео-пакета: max_payload + UDP_HEADER + VIDEO_HEADER
+        avg_packet_bytes = self.net_params.max_payload + UDP_HEADER_SIZE + VIDEO_HEADER_SIZE
         # Интервал между пакетами в секундах
         pacing_interval  = avg_packet_bytes / VIDEO_PACING_RATE_BYTES_SEC  # ~1.39 мс
 
-        SLEEP_THRESHOLD = 0.0003  # 0.3 мс — busy-wait точнее sleep(), но дешевле чем 0.5 мс
-
+        # Короче SLEEP_THRESHOLD — только busy-wait. Иначе sleep() до дедлайна
+        # минус SLEEP_MARGIN: на Windows запас покрывает пересып sleep(),
+        # на Linux/macOS sleep точен до десятков мкс — хватает 0.3 мс.
+        SLEEP_THRESHOLD = float('inf') if BUSY_PACING_ENABLED else 0.002
+        SLEEP_MARGIN    = 0.0015 if sys.platform == 'win32' else 0.0003
+        PACING_MAX_LAG  = 0.05    # 50 мс — предел догоняющего отставания расписания
+
+        set_thread_affinity("send")
+        pacing_q    = self.video_pacing_queue
+        pacing_evt  = self._video_evt
+        pool        = self._video_pool
+        mm          = _new_send_batch(VIDEO_SEND_BATCH_MAX)
         last_send_t = time.perf_counter()
+        idle        = True
 
         while self.running:
             try:
-                packet = self.video_pacing_queue.get(timeout=0.05)
-            except queue.Empty:
+                item = pacing_q.popleft()
+            except IndexError:
+                # Event сбрасываем ДО повторной проверки (как _pop_packet в
+                # AudioHandler): пакет, добавленный между popleft() и clear(),
+                # не проспит 50 мс.
+                pacing_evt.clear()
+                if not pacing_q:
+                    pacing_evt.wait(0.05)
                 continue
 
             if not self.server_addr:
+                pool.release(item[0])
                 continue
 
+            if self._kernel_pacing:
+                # Скорость держит ядро: отдаём всё, что накопилось, пачками
+                # без sleep — один wakeup на пачку вместо ~720 в секунду.
+                batch = [item]
+                while len(batch) < VIDEO_SEND_BATCH_MAX:
+                    try:
+                        batch.append(pacing_q.popleft())
+                    except IndexError:
+                        break
+                try:
+                    self.packets_sent += _send_batch(
+                        self.udp_sock, [pkt for _, pkt in batch], mm)
+                except Exception as e:
+                    _print_throttled("pacing", f"[Net] Pacing send error: {e}")
+                finally:
+                    for slot, _ in batch:
+                        pool.release(slot)
+                continue
+
+            # Дедлайны идут по расписанию (last_send_t += интервал пачки), а не
+            # от момента фактической отправки — опоздания не копятся в дрейф.
+            # Простой очереди не копит «кредит»: после паузы первый пакет идёт
+            # сразу, без догоняющей пачки. Если же очередь не пустела, а поток
+            # просто отстал (GIL, планировщик) — отставание догоняется пачками
+            # просроченных слотов, но не больше чем за PACING_MAX_LAG.
+            now = time.perf_counter()
+            if idle:
+                if now - last_send_t > pacing_interval:
+                    last_send_t = now - pacing_interval
+            elif now - last_send_t > PACING_MAX_LAG:
+                last_send_t = now - PACING_MAX_LAG
+
             # Ждём нужный момент отправки
             target_t = last_send_t + pacing_interval
-            now      = time.perf_counter()
             delta    = target_t - now
 
             if delta > SLEEP_THRESHOLD:
-                time.sleep(delta - SLEEP_THRESHOLD)
-                # Busy-wait оставшиеся <0.5 мс для точности
+                time.sleep(delta - SLEEP_MARGIN)
+            # Busy-wait остатка (или всего ожидания, если оно короче порога).
+            # sleep(0) отпускает GIL на каждой итерации — иначе до SLEEP_MARGIN
+            # голый цикл держит GIL и тормозит аудио/приёмные потоки.
+            # Чистый спин — только в режиме PULSECHAT_BUSY_PACE.
+            if BUSY_PACING_ENABLED:
                 while time.perf_counter() < target_t:
                     pass
-            elif delta > 0:
-                # Короткий busy-wait (< 0.5 мс)
+            else:
                 while time.perf_counter() < target_t:
-                    pass
+                    time.sleep(0)
+
+            # Пачка: VIDEO_PACING_BURST пакетов за одно пробуждение, а если
+            # sleep() проспал дольше (гранулярность ~1 мс на Windows) — все
+            # «созревшие» слоты. Следующий дедлайн сдвигается на интервал
+            # всей пачки, так что VIDEO_PACING_RATE_BYTES_SEC не превышается.
+            batch   = [item]
+            overdue = max(int((time.perf_counter() - target_t) / pacing_interval),
+                          VIDEO_PACING_BURST - 1)
+            while overdue > 0 and len(batch) < VIDEO_SEND_BATCH_MAX:
+                try:
+                    batch.append(pacing_q.popleft())
+                except IndexError:
+                    break
+                overdue -= 1
 
             try:
-                self.udp_sock.sendto(packet, self.server_addr)
-                self.packets_sent += 1
+                self.packets_sent += _send_batch(
+                    self.udp_sock, [pkt for _, pkt in batch], mm)
             except Exception as e:
-                print(f"[Net] Pacing send error: {e}")
+                _print_throttled("pacing", f"[Net] Pacing send error: {e}")
+            finally:
+                # Данные ушли в ядро — слоты можно переиспользовать
+                for slot, _ in batch:
+                    pool.release(slot)
 
-            last_send_t = time.perf_counter()
+            last_send_t = target_t + (len(batch) - 1) * pacing_interval
+            idle        = not pacing_q
 
     # ------------------------------------------------------------------
     # Приём UDP-пакетов
     # ------------------------------------------------------------------
     def udp_receive_loop(self):
+        # Один буфер приёма на поток (recv_into — без нового bytes на пакет;
+        # сокет подключён к серверу, адрес отправителя не нужен).
+        # Payload копируется bytes(...) только при передаче дальше: jitter-буферы
+        # аудио и сборка видео-кадров хранят его дольше следующего recv.
+        set_thread_affinity("recv")
+        if _RECVMMSG is not None:
+            self._udp_receive_loop_batched()
+            return
+        # Всё, что нужно на каждый пакет, — в локальных именах: сокет и таблица
+        # обработчиков живут до конца сессии (при переподключении потоки
+        # перезапускаются), заголовок разбирается прямо в цикле. Обработчики
+        # _on_* получают data — memoryview на буфер приёма, валидный только
+        # до следующего recv.
+        buf, mv   = new_recv_buffer()
+        recv_into = self.udp_sock.recv_into
+        unpack    = UDP_HEADER_UNPACK_FROM
+        handlers  = self._flag_handlers
+        hdr_size  = UDP_HEADER_SIZE
         while self.running:
             try:
-                data, addr = self.udp_sock.recvfrom(BUFFER_SIZE)
-                if len(data) < UDP_HEADER_SIZE:
+                n = recv_into(buf)
+                if n < hdr_size:
                     continue
+                data = mv[:n]
+                uid, ts, seq, flags = unpack(data)
+                handlers[flags](data, uid, ts, seq, flags)
+            except Exception as e:
+                if self.running:
+                    _print_throttled("udp-recv", f"[Net] UDP receive error: {e}")
+                continue
 
-                uid, ts, seq, flags = UDP_HEADER_STRUCT.unpack(data[:UDP_HEADER_SIZE])
-
-                if flags == 254:
-                    # Pong — измеряем RTT
-                    self.packets_received += 1
-                    delay = (time.time() - ts) * 1000
-                    if self.current_ping == 0:
-                        self.current_ping = int(delay)
-                    else:
-                        self.current_ping = int(self.current_ping * 0.7 + delay * 0.3)
-
-                elif flags & FLAG_VIDEO:
-                    if self.video:
-                        self.video.process_incoming_packet(uid, data[UDP_HEADER_SIZE:])
-                    else:
-                        print(f"[Net] Video packet from {uid}, but VideoEngine not initialized")
-
-                elif flags & FLAG_STREAM_AUDIO and flags & FLAG_STREAM_VOICES:
-                    # Голосовой поток стрима — Mix Minus без DSP.
-                    # Payload: [speaker_uid: 4 байта] + [opus].
-                    # Свой голос отбрасываем — не слышим себя в стриме.
-                    if len(data) < UDP_HEADER_SIZE + STREAM_VOICE_HEADER_SIZE:
-                        continue
-                    speaker_uid, = STREAM_VOICE_HEADER_STRUCT.unpack(
-                        data[UDP_HEADER_SIZE: UDP_HEADER_SIZE + STREAM_VOICE_HEADER_SIZE]
-                    )
-                    if speaker_uid == self.audio.my_uid:
-                        continue
-                    opus_payload = data[UDP_HEADER_SIZE + STREAM_VOICE_HEADER_SIZE:]
-                    self.audio.add_incoming_stream_packet(speaker_uid, seq, opus_payload, flags)
-
-                elif flags & FLAG_STREAM_AUDIO:
-                    # Стрим-аудио (системный звук / виртуальный кабель)
-                    is_loopback = bool(flags & FLAG_LOOPBACK_AUDIO)
-                    if seq % 50 == 0:
-                        print(f"[Net-Recv] FLAG_STREAM_AUDIO (loopback={is_loopback}) от uid={uid}")
-                    self.audio.add_incoming_stream_packet(uid, seq, data[UDP_HEADER_SIZE:], flags)
-
-                elif flags & FLAG_WHISPER:
-                    # Шёпот — приватный голос от sender к нам.
-                    # Payload: [target_uid: 4 байта] + [opus].
-                    # Отбрасываем 4-байтовый заголовок target_uid перед декодированием,
-                    # иначе opuslib получит мусор в начале и вернёт ошибку.
-                    if len(data) < UDP_HEADER_SIZE + STREAM_VOICE_HEADER_SIZE:
-                        continue
-                    opus_payload = data[UDP_HEADER_SIZE + STREAM_VOICE_HEADER_SIZE:]
-                    # add_incoming_whisper_packet: испускает сигнал whisper_received(uid)
-                    # при первом пакете от нового шептуна → UI показывает баннер.
-                    self.audio.add_incoming_whisper_packet(uid, seq, opus_payload)
-
-                else:
-                    # Обычный голос чата
-                    self.audio.add_incoming_packet(uid, seq, data[UDP_HEADER_SIZE:], flags)
-
+    def _udp_receive_loop_batched(self):
+        """
+        Linux: recvmmsg — до UDP_RECV_BATCH_MAX датаграмм за системный вызов
+        (и за одно отпускание/захват GIL) вместо recvfrom на каждый пакет.
+        """
+        batch    = _RecvBatch()
+        recv     = batch.recv
+        datagram = batch.datagram
+        fd       = self.udp_sock.fileno()
+        unpack   = UDP_HEADER_UNPACK_FROM
+        handlers = self._flag_handlers
+        hdr_size = UDP_HEADER_SIZE
+        while self.running:
+            try:
+                n = recv(fd)
             except Exception as e:
                 if self.running:
-                    print(f"[Net] UDP receive error: {e}")
+                    _print_throttled("udp-recv", f"[Net] UDP receive error: {e}")
                 continue
+            for i in range(n):
+                data = datagram(i)
+                if data is None or len(data) < hdr_size:
+                    continue
+                try:
+                    uid, ts, seq, flags = unpack(data)
+                    handlers[flags](data, uid, ts, seq, flags)
+                except Exception as e:
+                    _print_throttled("udp-handle", f"[Net] UDP packet handling error: {e}")
+
+    # Биты flags, определяющие тип пакета. Остальные (mute/deaf, loopback)
+    # на выбор обработчика не влияют.
+    _KIND_MASK = FLAG_VIDEO | FLAG_STREAM_AUDIO | FLAG_STREAM_VOICES | FLAG_WHISPER
+
+    def _build_flag_handlers(self):
+        """
+        Таблица переходов на все 256 значений байта flags: обработчик
+        выбирается по flags & _KIND_MASK с тем же приоритетом, что был у
+        цепочки if/elif (видео > голоса стрима > стрим-аудио > шёпот > голос),
+        254 — pong. На пакет остаётся один индекс в списке — без сравнений и &.
+        """
+        table = []
+        for flags in range(256):
+            kind = flags & self._KIND_MASK
+            if flags == 254:
+                handler = self._on_pong
+            elif kind & FLAG_VIDEO:
+                handler = self._on_video
+            elif kind & FLAG_STREAM_AUDIO and kind & FLAG_STREAM_VOICES:
+                handler = self._on_stream_voice
+            elif kind & FLAG_STREAM_AUDIO:
+                handler = self._on_stream_audio
+            elif kind & FLAG_WHISPER:
+                handler = self._on_whisper
+            else:
+                handler = self._on_voice
+            table.append(handler)
+        return table
+
+    def _on_pong(self, data, uid, ts, seq, flags):
+        # Pong — измеряем RTT. Время отправки берём из своего кольца по seq,
+        # а не из отражённого timestamp: perf_counter_ns монотонен (NTP, сон
+        # не дают отрицательных/огромных задержек), а чужой или запоздавший
+        # pong (слот уже перезаписан / использован) просто отбрасывается.
+        self.packets_received += 1
+        slot = seq & self.PING_RING_MASK
+        sent_seq, sent_ns = self._ping_ring[slot]
+        if sent_seq != seq:
+            return
+        self._ping_ring[slot] = (-1, 0)
+        # EWMA 0.7/0.3 в целых миллисекундах. Первый замер после подключения
+        # берётся как есть — по флагу, а не по current_ping == 0: пинг 0 мс
+        # (LAN) иначе бесконечно «переинициализировал» бы среднее.
+        delay = (time.perf_counter_ns() - sent_ns) // 1_000_000
+        if self._ping_initialized:
+            self.current_ping = (self.current_ping * 7 + delay * 3) // 10
+        else:
+            self.current_ping      = delay
+            self._ping_initialized = True
+
+    def _on_video(self, data, uid, ts, seq, flags):
+        if self.video:
+            # Без копии: VideoEngine сам копирует только payload чанка
+            self.video.process_incoming_packet(uid, data[UDP_HEADER_SIZE:])
+        else:
+            _print_throttled("video-no-engine",
+                             f"[Net] Video packet from {uid}, but VideoEngine not initialized")
+
+    def _on_stream_voice(self, data, uid, ts, seq, flags):
+        # Голосовой поток стрима — Mix Minus без DSP.
+        # Payload: [speaker_uid: 4 байта] + [opus].
+        # Свой голос отбрасываем — не слышим себя в стриме.
+        if len(data) < UDP_HEADER_SIZE + STREAM_VOICE_HEADER_SIZE:
+            return
+        speaker_uid, = STREAM_VOICE_UNPACK_FROM(data, UDP_HEADER_SIZE)
+        if speaker_uid == self.audio.my_uid:
+            return
+        opus_payload = bytes(data[UDP_HEADER_SIZE + STREAM_VOICE_HEADER_SIZE:])
+        self.audio.add_incoming_stream_packet(speaker_uid, seq, opus_payload, flags)
+
+    def _on_stream_audio(self, data, uid, ts, seq, flags):
+        # Стрим-аудио (системный звук / виртуальный кабель)
+        if seq % 50 == 0:
+            _print_throttled(f"stream-audio-{uid}",
+                             f"[Net-Recv] FLAG_STREAM_AUDIO (loopback={bool(flags & FLAG_LOOPBACK_AUDIO)}) от uid={uid}")
+        self.audio.add_incoming_stream_packet(uid, seq, bytes(data[UDP_HEADER_SIZE:]), flags)
+
+    def _on_whisper(self, data, uid, ts, seq, flags):
+        # Шёпот — приватный голос от sender к нам.
+        # Payload: [target_uid: 4 байта] + [opus].
+        # Отбрасываем 4-байтовый заголовок target_uid перед декодированием,
+        # иначе opuslib получит мусор в начале и вернёт ошибку.
+        if len(data) < UDP_HEADER_SIZE + STREAM_VOICE_HEADER_SIZE:
+            return
+        opus_payload = bytes(data[UDP_HEADER_SIZE + STREAM_VOICE_HEADER_SIZE:])
+        # add_incoming_whisper_packet: испускает сигнал whisper_received(uid)
+        # при первом пакете от нового шептуна → UI показывает баннер.
+        self.audio.add_incoming_whisper_packet(uid, seq, opus_payload)
+
+    def _on_voice(self, data, uid, ts, seq, flags):
+        # Обычный голос чата
+        self.audio.add_incoming_packet(uid, seq, bytes(data[UDP_HEADER_SIZE:]), flags)
 
     # ------------------------------------------------------------------
     # Отправка аудио-пакетов из очереди AudioHandler
     # ------------------------------------------------------------------
     def udp_sender_loop(self):
+        # Голосовые пакеты нескольких потоков (микрофон, шёпот, стрим-аудио,
+        # голоса стрима) часто лежат в очереди одновременно — забираем всё,
+        # что накопилось, и отправляем одним sendmmsg() на Linux.
+        # Ждём блокирующим get() без таймаута: простой не будит поток и не
+        # бросает queue.Empty 10 раз в секунду. Остановку сигналит None
+        # (stop_loops), после которого while перепроверяет self.running.
+        set_thread_affinity("send")
+        send_q = self.audio.send_queue
+        mm     = _new_send_batch(AUDIO_SEND_BATCH_MAX)
         while self.running:
+            pkt = send_q.get()
+            if pkt is None:
+                continue
+            batch = [pkt]
+            while len(batch) < AUDIO_SEND_BATCH_MAX:
+                try:
+                    pkt = send_q.get_nowait()
+                except queue.Empty:
+                    break
+                if pkt is None:
+                    break
+                batch.append(pkt)
+            if not self.server_addr:
+                continue
             try:
-                packet = self.audio.send_queue.get(timeout=0.1)
-                if self.server_addr:
-                    self.udp_sock.sendto(packet, self.server_addr)
-            except Exception:
+                _send_batch(self.udp_sock, batch, mm)
+            except OSError:
+                # Сеть недоступна / сокет закрыт при переподключении —
+                # голосовой пакет устаревает за 20 мс, повторять нечего.
                 continue
 
     # ------------------------------------------------------------------
     # Keepalive (статус mute/deaf) и Ping
     # ------------------------------------------------------------------
-    def udp_keepalive_loop(self):
-        while self.running:
-            if self.audio.my_uid != 0:
-                flags = (1 if self.audio.is_muted else 0) | (2 if self.audio.is_deafened else 0)
-                try:
-                    header = UDP_HEADER_STRUCT.pack(self.audio.my_uid, time.time(), 0, flags)
-                    self.udp_sock.sendto(header, self.server_addr)
-                except Exception as e:
-                    print(f"[Net] Keepalive error: {e}")
-            time.sleep(1)
+    KEEPALIVE_INTERVAL = 1.0   # сек — статус mute/deaf
+    PING_INTERVAL      = 7.0   # сек — замер RTT
+    PING_RING_MASK     = 63    # кольцо из 64 пингов (~7 минут при 7 с)
 
-    def ping_loop(self):
+    def udp_timer_loop(self):
+        """
+        Keepalive и ping в одном потоке: спим ровно до ближайшего дедлайна
+        (time.monotonic) вместо двух потоков с sleep(1) / sleep(7).
+        Дедлайны отсчитываются от расписания, а не от момента пробуждения —
+        период не «уплывает» на время отправки и неточность sleep().
+        """
+        audio     = self.audio
+        # Шаблоны заголовков собираются один раз на uid: на тике в них
+        # дописывается только timestamp и байт flags у keepalive, seq у ping.
+        ka_buf    = bytearray(UDP_HEADER_SIZE)
+        ping_buf  = bytearray(UDP_HEADER_SIZE)
+        tmpl_uid  = 0
+        now       = time.monotonic()
+        next_ka   = now
+        next_ping = now
         while self.running:
-            if self.audio.my_uid != 0:
-                try:
-                    header = UDP_HEADER_STRUCT.pack(self.audio.my_uid, time.time(), 0, 254)
-                    self.udp_sock.sendto(header, self.server_addr)
-                    self.packets_sent += 1
-                except Exception as e:
-                    print(f"[Net] Ping error: {e}")
-            time.sleep(7)
+            now = time.monotonic()
+            uid = audio.my_uid
+            if uid != tmpl_uid:
+                UDP_HEADER_PACK_INTO(ka_buf,   0, uid, 0.0, 0, 0)
+                UDP_HEADER_PACK_INTO(ping_buf, 0, uid, 0.0, 0, 254)
+                tmpl_uid = uid
+            if now >= next_ka:
+                next_ka += self.KEEPALIVE_INTERVAL
+                if next_ka <= now:
+                    next_ka = now + self.KEEPALIVE_INTERVAL
+                if uid != 0:
+                    ka_buf[UDP_HEADER_FLAGS_OFFSET] = (
+                        (1 if audio.is_muted else 0) | (2 if audio.is_deafened else 0))
+                    UDP_TS_PACK_INTO(ka_buf, UDP_HEADER_TS_OFFSET, now)
+                    try:
+                        self.udp_sock.send(ka_buf)
+                    except Exception as e:
+                        print(f"[Net] Keepalive error: {e}")
+            if now >= next_ping:
+                next_ping += self.PING_INTERVAL
+                if next_ping <= now:
+                    next_ping = now + self.PING_INTERVAL
+                if uid != 0:
+                    # Время отправки остаётся у нас (кольцо по seq), в пакет
+                    # идёт только 16-битный seq — сервер отражает его как есть.
+                    seq = (self._ping_seq + 1) & 0xFFFF
+                    self._ping_seq = seq
+                    UDP_SEQ_PACK_INTO(ping_buf, UDP_HEADER_SEQ_OFFSET, seq)
+                    self._ping_ring[seq & self.PING_RING_MASK] = (seq, time.perf_counter_ns())
+                    try:
+                        self.udp_sock.send(ping_buf)
+                        self.packets_sent += 1
+                    except Exception as e:
+                        print(f"[Net] Ping error: {e}")
+            time.sleep(max(0.0, min(next_ka, next_ping) - time.monotonic()))
 
     # ------------------------------------------------------------------
     # TCP — команды сервера
     # ------------------------------------------------------------------
     def tcp_listen(self):
-        raw_data = ""
-        # JSONDecoder создаём ОДИН РАЗ — он stateless и thread-safe.
-        # Создание внутри цикла (старый код) аллоцировало новый объект на КАЖДОЕ
-        # входящее сообщение: при 10 sync/сек это +10 аллокаций/сек без причины.
-        _decoder = json.JSONDecoder()
+        # Сервер шлёт [длина: 4 байта][JSON] (config.pack_frame). Полные фреймы
+        # вырезаются из bytearray по длине и парсятся один раз; незавершённый
+        # хвост просто ждёт следующего recv — без повторного разбора и без
+        # копирования str на каждое сообщение.
+        buf        = bytearray()
+        hdr_size   = TCP_FRAME_HEADER_SIZE
+        unpack_len = TCP_FRAME_UNPACK_FROM
         while self.running:
             try:
-                chunk_bytes = self.tcp_sock.recv(4096)
+                chunk_bytes = self.tcp_sock.recv(65536)
                 if not chunk_bytes:
                     print("[Net] Server closed connection (empty recv).")
                     break
-                raw_data += chunk_bytes.decode('utf-8', errors='ignore')
-                while True:
-                    try:
-                        msg, idx = _decoder.raw_decode(raw_data)
-                        raw_data = raw_data[idx:].lstrip()
-                        self.process_message(msg)
-                    except json.JSONDecodeError:
+                buf += chunk_bytes
+                start = 0
+                while len(buf) - start >= hdr_size:
+                    n, = unpack_len(buf, start)
+                    if n > MAX_TCP_FRAME:
+                        raise ValueError(f"TCP frame too large: {n} bytes")
+                    end = start + hdr_size + n
+                    if len(buf) < end:
                         break
+                    msg   = json_loads(buf[start + hdr_size:end])
+                    start = end
+                    self.process_message(msg)
+                if start:
+                    del buf[:start]
             except (ConnectionResetError, ConnectionAbortedError, OSError) as e:
                 if self.running:
                     print(f"[Net] TCP connection error: {e}")
@@ -511,39 +1256,64 @@ class NetworkClient(QObject):
         if self.running:
             self._on_connection_lost()
 
+    def _build_tcp_handlers(self):
+        """
+        Таблица action → обработчик TCP-сообщения сервера: вместо цепочки
+        if/elif по строкам (sync_users приходит ~10 раз в секунду) — один
+        поиск в dict.
+        """
+        return {
+            'login_success':     self._on_login_success,
+            'sync_users':        self._on_sync_users,
+            'play_soundboard':   self._on_play_soundboard,
+            'request_keyframe':  self._on_request_keyframe,
+            CMD_PLAY_NUDGE:      self._on_play_nudge,
+            CMD_NUDGE_TRIGGERED: self._on_nudge_triggered,
+        }
+
     def process_message(self, msg):
-        act = msg.get('action')
-        if act == 'login_success':
-            self.connected.emit(msg)
-            print(f"[Net] Login success, UID: {msg.get('uid')}")
-        elif act == 'sync_users':
-            self.global_state_update.emit(msg.get('all_users', {}))
-        elif act == 'play_soundboard':
-            self.play_soundboard_file(msg.get('file'), msg.get('data_b64'), msg.get('from_nick'))
-        elif act == 'request_keyframe':
-            if self.video:
-                self.video.force_keyframe()
-                print("[Net] IDR keyframe запрошен сервером → передано VideoEngine")
-
-        elif act == CMD_PLAY_NUDGE:
-            # Нас пнули — воспроизводим звук в отдельном потоке.
-            # Звук намеренно обходит deaf/mute — цель фичи «достучаться» до АФК.
-            threading.Thread(
-                target=self._play_nudge_sound,
-                daemon=True,
-                name="nudge-sound",
-            ).start()
-            self.nudge_received.emit()
-
-        elif act == CMD_NUDGE_TRIGGERED:
-            # Broadcast: кого-то пнули в нашей комнате → показываем тост у всех
-            target_nick = msg.get('target_nick', '?')
-            voter_nick  = msg.get('voter_nick',  '?')
-            self.nudge_triggered.emit(target_nick, voter_nick)
+        handler = self._tcp_handlers.get(msg.get('action'))
+        if handler is not None:
+            handler(msg)
+        else:
+            _print_throttled("tcp-unknown", f"[Net] Unknown action: {msg.get('action')!r}")
+
+    def _on_login_success(self, msg):
+        self.connected.emit(msg)
+        print(f"[Net] Login success, UID: {msg.get('uid')}")
+
+    def _on_sync_users(self, msg):
+        self.global_state_update.emit(msg.get('all_users', {}))
+
+    def _on_play_soundboard(self, msg):
+        self._sfx_pool.submit(self.play_soundboard_file,
+                              msg.get('file'), msg.get('data_b64'), msg.get('from_nick'))
+
+    def _on_request_keyframe(self, msg):
+        if self.video:
+            self.video.force_keyframe()
+            print("[Net] IDR keyframe запрошен сервером → передано VideoEngine")
+
+    def _on_play_nudge(self, msg):
+        # Нас пнули — воспроизводим звук в отдельном потоке.
+        # Звук намеренно обходит deaf/mute — цель фичи «достучаться» до АФК.
+        threading.Thread(
+            target=self._play_nudge_sound,
+            daemon=True,
+            name="nudge-sound",
+        ).start()
+        self.nudge_received.emit()
+
+    def _on_nudge_triggered(self, msg):
+        # Broadcast: кого-то пнули в нашей комнате → показываем тост у всех
+        target_nick = msg.get('target_nick', '?')
+        voter_nick  = msg.get('voter_nick',  '?')
+        self.nudge_triggered.emit(target_nick, voter_nick)
 
     def send_json(self, data):
         try:
-            self.tcp_sock.sendall(json.dumps(data).encode('utf-8'))
+            # [длина][JSON] — сервер режет поток по длине (config.pack_frame)
+            self.tcp_sock.sendall(pack_frame(json_dumps(data)))
         except Exception as e:
             print(f"[Net] Send JSON error: {e}")
 
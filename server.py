@@ -1,22 +1,32 @@
 import socket
 import threading
-import json
 import time
 import secrets
+import argparse
 from config import (
-    DEFAULT_PORT_TCP, DEFAULT_PORT_UDP, BUFFER_SIZE,
-    UDP_RECV_BUFFER_SIZE, UDP_SEND_BUFFER_SIZE,
-    UDP_HEADER_STRUCT, UDP_HEADER_SIZE, FLAG_VIDEO, FLAG_STREAM_AUDIO,
+    DEFAULT_PORT_TCP, DEFAULT_PORT_UDP, new_recv_buffer,
+    UDP_HEADER_UNPACK_FROM, UDP_HEADER_SIZE, FLAG_VIDEO, FLAG_STREAM_AUDIO,
     CMD_LOGIN, CMD_JOIN_ROOM, CMD_STREAM_START, CMD_STREAM_STOP,
     CMD_SYNC_USERS, CMD_SOUNDBOARD, FLAG_LOOPBACK_AUDIO, FLAG_STREAM_VOICES,
-    FLAG_WHISPER, STREAM_VOICE_HEADER_STRUCT, STREAM_VOICE_HEADER_SIZE,
+    FLAG_WHISPER, STREAM_VOICE_UNPACK_FROM, STREAM_VOICE_HEADER_SIZE,
     CMD_UPDATE_PRESENCE,
     CMD_NUDGE_VOTE, CMD_PLAY_NUDGE, CMD_NUDGE_TRIGGERED, NUDGE_COOLDOWN_SEC,
+    pack_frame, TCP_FRAME_HEADER_SIZE, TCP_FRAME_UNPACK_FROM, MAX_TCP_FRAME,
+    json_dumps, json_loads,
 )
+from net_utils import (
+    apply_udp_buffers, set_incoming_cpu, set_thread_affinity, disable_udp_connreset,
+    disable_udp_checksum,
+)
+
+
+def _frame(obj) -> bytes:
+    """ JSON-сообщение клиенту: [длина][UTF-8 JSON] (config.pack_frame) """
+    return pack_frame(json_dumps(obj))
 
 
 class SFUServer:
-    def __init__(self, host='0.0.0.0'):
+    def __init__(self, host='0.0.0.0', udp_rcv=None, udp_snd=None):
         # --- TCP ---
         self.tcp_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.tcp_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
@@ -28,8 +38,12 @@ class SFUServer:
         # FIX #4: Увеличены буферы ядра.
         # SO_RCVBUF: 8 MB — пакеты не дропаются пока handler занят маршрутизацией.
         # SO_SNDBUF: 8 MB — исходящая очередь не блокирует recv-путь.
-        self.udp_sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RECV_BUFFER_SIZE)
-        self.udp_sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, UDP_SEND_BUFFER_SIZE)
+        # Размеры: --udp-rcv/--udp-snd > PULSECHAT_UDP_RCV/SND > 8 MB;
+        # apply_udp_buffers() подбирает максимум, который разрешает ядро.
+        apply_udp_buffers(self.udp_sock, udp_rcv, udp_snd, tag="Server")
+        disable_udp_checksum(self.udp_sock, tag="Server")
+        disable_udp_connreset(self.udp_sock, tag="Server")
+        set_incoming_cpu(self.udp_sock, tag="Server")
         self.udp_sock.bind((host, DEFAULT_PORT_UDP))
 
         # -------------------------------------------------------------------
@@ -105,13 +119,21 @@ class SFUServer:
             for addr in targets:
                 sendto(addr)         # I/O вне лока
         """
+        # Один буфер приёма на поток: пакет только пересылается (sendto —
+        # синхронно, до следующего recv), поэтому data — memoryview без копий.
+        set_thread_affinity("recv")
+        buf, mv = new_recv_buffer()
+        recv_into  = self.udp_sock.recvfrom_into
+        unpack_hdr = UDP_HEADER_UNPACK_FROM
+        unpack_sv  = STREAM_VOICE_UNPACK_FROM
         while True:
             try:
-                data, addr = self.udp_sock.recvfrom(BUFFER_SIZE)
-                if len(data) < UDP_HEADER_SIZE:
+                n, addr = recv_into(buf)
+                if n < UDP_HEADER_SIZE:
                     continue
+                data = mv[:n]
 
-                sender_uid, msg_ts, seq, flags = UDP_HEADER_STRUCT.unpack(data[:UDP_HEADER_SIZE])
+                sender_uid, msg_ts, seq, flags = unpack_hdr(data)
 
                 # Ping: отвечаем немедленно, без локов
                 if flags == 254:
@@ -143,9 +165,7 @@ class SFUServer:
                     # Остальные участники комнаты пакет не получают.
                     if len(data) < UDP_HEADER_SIZE + STREAM_VOICE_HEADER_SIZE:
                         continue
-                    (target_uid,) = STREAM_VOICE_HEADER_STRUCT.unpack(
-                        data[UDP_HEADER_SIZE: UDP_HEADER_SIZE + STREAM_VOICE_HEADER_SIZE]
-                    )
+                    (target_uid,) = unpack_sv(data, UDP_HEADER_SIZE)
                     with self.udp_lock:
                         target_addr = self.udp_map.get(target_uid)
                     if target_addr:
@@ -216,21 +236,31 @@ class SFUServer:
     def tcp_handler(self, conn, addr):
         uid = secrets.randbelow(10**9) + 1  # криптографически уникальный, без коллизий
         client_ip = addr[0]
-        buffer = ""
-        # JSONDecoder создаём ОДИН РАЗ на соединение — он stateless.
-        # Каждое сообщение json.JSONDecoder() в старом коде = лишняя аллокация.
-        _decoder = json.JSONDecoder()
+        # Клиент шлёт [длина: 4 байта][JSON] (config.pack_frame) — как и сервер
+        # клиенту. Полные фреймы вырезаются из bytearray по длине, буфер
+        # обрезается один раз на recv; незавершённый хвост ждёт следующего recv.
+        buf        = bytearray()
+        hdr_size   = TCP_FRAME_HEADER_SIZE
+        unpack_len = TCP_FRAME_UNPACK_FROM
         try:
             while True:
-                chunk_bytes = conn.recv(4096)  # TCP: JSON-команды редко превышают 1 КБ
+                chunk_bytes = conn.recv(65536)  # кастомный soundboard (base64) — сотни КБ
                 if not chunk_bytes:
                     break
-                buffer += chunk_bytes.decode('utf-8', errors='ignore')
-
-                while True:
+                buf += chunk_bytes
+
+                start = 0
+                while len(buf) - start >= hdr_size:
+                    n, = unpack_len(buf, start)
+                    if n > MAX_TCP_FRAME:
+                        raise ValueError(f"TCP frame too large: {n} bytes")
+                    end = start + hdr_size + n
+                    if len(buf) < end:
+                        break
+                    frame = buf[start + hdr_size:end]
+                    start = end
                     try:
-                        msg, idx = _decoder.raw_decode(buffer)
-                        buffer = buffer[idx:].lstrip()
+                        msg = json_loads(frame)
                         action = msg.get('action')
 
                         if action == CMD_LOGIN:
@@ -249,7 +279,7 @@ class SFUServer:
                             with self.udp_lock:
                                 self.uid_to_room[uid] = 'General'
                             conn.sendall(
-                                json.dumps({'action': 'login_success', 'uid': uid}).encode('utf-8')
+                                _frame({'action': 'login_success', 'uid': uid})
                             )
                             with self.clients_lock:
                                 remaining = len(self.clients)
@@ -344,7 +374,7 @@ class SFUServer:
                             if streamer_conn:
                                 try:
                                     streamer_conn.sendall(
-                                        json.dumps({'action': 'request_keyframe'}).encode('utf-8')
+                                        _frame({'action': 'request_keyframe'})
                                     )
                                     print(f"[Server] IDR запрошен у стримера uid={streamer_uid}")
                                 except Exception:
@@ -371,7 +401,7 @@ class SFUServer:
                                 sender_nick = self.clients[conn]['nick'] if conn in self.clients else '?'
                                 conns = list(self.clients.keys())
                             msg['from_nick'] = sender_nick
-                            payload = json.dumps(msg).encode('utf-8')
+                            payload = _frame(msg)
                             # FIX #2: sendall вне clients_lock — не блокируем чтение других потоков
                             for c in conns:
                                 try:
@@ -467,26 +497,30 @@ class SFUServer:
                                 # Отправляем play_nudge только цели
                                 try:
                                     t_conn.sendall(
-                                        json.dumps({'action': CMD_PLAY_NUDGE}).encode('utf-8')
+                                        _frame({'action': CMD_PLAY_NUDGE})
                                     )
                                     print(f"[Server] 👟 NUDGE FIRED → {target_nick}")
                                 except Exception:
                                     pass
 
                                 # Рассылаем nudge_triggered всем в комнате (тост у всех)
-                                broadcast_payload = json.dumps({
+                                broadcast_payload = _frame({
                                     'action':      CMD_NUDGE_TRIGGERED,
                                     'target_nick': target_nick,
                                     'voter_nick':  voter_nick,
-                                }).encode('utf-8')
+                                })
                                 for bc in broadcaster_conns:
                                     try:
                                         bc.sendall(broadcast_payload)
                                     except Exception:
                                         pass
 
-                    except json.JSONDecodeError:
-                        break
+                    except (ValueError, AttributeError) as e:
+                        # Битый фрейм (не JSON / не объект) — пропускаем только его,
+                        # границы следующих фреймов известны по длине
+                        print(f"[Server] Некорректное сообщение от {client_ip}: {e}")
+                if start:
+                    del buf[:start]
 
         except Exception as e:
             err_code = getattr(e, 'winerror', None) or getattr(e, 'errno', None)
@@ -528,7 +562,7 @@ class SFUServer:
     # ------------------------------------------------------------------
     # Вспомогательный метод: отправка пакета всем зрителям стримера
     # ------------------------------------------------------------------
-    def _send_to_watchers(self, sender_uid: int, data: bytes):
+    def _send_to_watchers(self, sender_uid: int, data):
         """
         Отправляет UDP-пакет всем зрителям стримера sender_uid.
 
@@ -593,7 +627,7 @@ class SFUServer:
                 })
                 conns_snapshot.append(c_conn)
 
-        payload = json.dumps({'action': CMD_SYNC_USERS, 'all_users': state}).encode('utf-8')
+        payload = _frame({'action': CMD_SYNC_USERS, 'all_users': state})
 
         # Шаг 3: отправить — без лока, медленный клиент не тормозит UDP
         for c_conn in conns_snapshot:
@@ -611,8 +645,16 @@ class SFUServer:
         print(f"Server started. TCP:{DEFAULT_PORT_TCP}, UDP:{DEFAULT_PORT_UDP}")
         while True:
             conn, addr = self.tcp_sock.accept()
+            try:
+                conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except OSError:
+                pass
             threading.Thread(target=self.tcp_handler, args=(conn, addr), daemon=True).start()
 
 
 if __name__ == "__main__":
-    SFUServer().start()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="PulseChat SFU server")
+    parser.add_argument("--udp-rcv", type=int, default=None, help="SO_RCVBUF UDP-сокета, байт")
+    parser.add_argument("--udp-snd", type=int, default=None, help="SO_SNDBUF UDP-сокета, байт")
+    args = parser.parse_args()
+    SFUServer(udp_rcv=args.udp_rcv, udp_snd=args.udp_snd).start()
\ No newline at end of file
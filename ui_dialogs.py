@@ -12,7 +12,7 @@ from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QSc
                              QGroupBox, QSizePolicy, QFileDialog, QMessageBox)
 from PyQt6.QtCore import Qt, QSize, QSettings, QEvent, QPropertyAnimation, QEasingCurve, QRect, QPoint, QTimer, pyqtSignal
 from PyQt6.QtGui import QIcon, QGuiApplication, QPainter, QColor, QPen, QFont, QPainterPath, QBrush
-from config import resource_path, CMD_SOUNDBOARD
+from config import resource_path, ASSETS, CMD_SOUNDBOARD
 from audio_engine import PYRNNOISE_AVAILABLE
 
 # ── Максимальный размер кастомного звука (1 MB) ──────────────────────────────
@@ -704,7 +704,7 @@ class AvatarSelector(QDialog):
         grid.setSpacing(8)
         grid.setContentsMargins(0, 0, 0, 0)
 
-        av_dir = resource_path("assets/avatars")
+        av_dir = ASSETS.AVATARS_DIR
         if os.path.exists(av_dir):
             files = sorted([f for f in os.listdir(av_dir) if f.endswith('.svg')])
             for i, f in enumerate(files):
@@ -834,7 +834,7 @@ class WhisperSystemOverlay(QWidget):
         # Иконка whispers.ico вместо эмодзи
         self._icon_lbl = QLabel()
         self._icon_lbl.setFixedSize(26, 26)
-        icon_path = resource_path("assets/icon/whispers.ico")
+        icon_path = ASSETS.ICON_WHISPERS
         if os.path.exists(icon_path):
             self._icon_lbl.setPixmap(QIcon(icon_path).pixmap(26, 26))
         else:
@@ -946,8 +946,7 @@ class _DialogTitleBar(QWidget):
         ico_lbl = QLabel()
         ico_lbl.setFixedSize(18, 18)
         try:
-            from config import resource_path
-            ico_lbl.setPixmap(QIcon(resource_path("assets/icon/logo.ico")).pixmap(18, 18))
+            ico_lbl.setPixmap(QIcon(ASSETS.ICON_LOGO).pixmap(18, 18))
         except Exception:
             pass
         ico_lbl.setStyleSheet("background:transparent; border:none;")
@@ -2073,7 +2072,7 @@ class SettingsDialog(QDialog):
 
         icon_lbl = QLabel()
         icon_lbl.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        icon_path = resource_path("assets/icon/app_icon.ico")
+        icon_path = ASSETS.ICON_APP
         if os.path.exists(icon_path):
             icon_lbl.setPixmap(QIcon(icon_path).pixmap(64, 64))
         lay.addWidget(icon_lbl)
@@ -2853,7 +2852,7 @@ class SoundboardPanel(QWidget):
         card_lay.addWidget(sep)
 
         # ── Собираем все звуки ────────────────────────────────────────────────
-        sd_dir = resource_path("assets/panel")
+        sd_dir = ASSETS.PANEL_DIR
         default_files = []
         if os.path.exists(sd_dir):
             default_files = sorted([f for f in os.listdir(sd_dir)
@@ -3348,7 +3347,7 @@ class SelfStatusOverlayPanel(QFrame):
 
     def _load_icons(self, selected: str):
         """Сканирует assets/status/ и заполняет сетку кнопками-иконками."""
-        status_dir = resource_path("assets/status")
+        status_dir = ASSETS.STATUS_DIR
         svgs = []
         if os.path.isdir(status_dir):
             svgs = sorted(f for f in os.listdir(status_dir) if f.lower().endswith('.svg'))
@@ -3362,7 +3361,7 @@ class SelfStatusOverlayPanel(QFrame):
 
         for idx, fname in enumerate(svgs):
             row, col = divmod(idx, self._COLS)
-            path = resource_path(f"assets/status/{fname}")
+            path = os.path.join(ASSETS.STATUS_DIR, fname)
 
             btn = QPushButton()
             btn.setFixedSize(self._BTN_SZ, self._BTN_SZ)
@@ -3668,7 +3667,7 @@ class StatusDialog(QDialog):
 
     def _load_icons(self, selected: str):
         """Сканирует assets/status/ и заполняет сетку кнопками-иконками."""
-        status_dir = resource_path("assets/status")
+        status_dir = ASSETS.STATUS_DIR
         svgs = []
         if os.path.isdir(status_dir):
             svgs = sorted(f for f in os.listdir(status_dir) if f.lower().endswith('.svg'))
@@ -3682,7 +3681,7 @@ class StatusDialog(QDialog):
 
         for idx, fname in enumerate(svgs):
             row, col = divmod(idx, self._COLS)
-            path = resource_path(f"assets/status/{fname}")
+            path = os.path.join(ASSETS.STATUS_DIR, fname)
 
             btn = QPushButton()
             btn.setFixedSize(self._BTN_SZ, self._BTN_SZ)
@@ -48,7 +48,7 @@ class CustomTitleBar(QWidget):
         self._icon_lbl = QLabel()
         self._icon_lbl.setFixedSize(22, 22)
         self._icon_lbl.setPixmap(
-            QIcon(resource_path("assets/icon/logo.ico")).pixmap(22, 22)
+            QIcon(ASSETS.ICON_LOGO).pixmap(22, 22)
         )
         # Inline-стиль намеренно НЕ устанавливается: у QLabel без своего
         # setStyleSheet() родительский stylesheet (#customTitleBar *) применяется
@@ -294,7 +294,6 @@ class MainWindow(QMainWindow):
     def setup_ui(self):
         self.setWindowTitle(f"{APP_NAME} v{APP_VERSION} — {self.nick}")
         self.setMinimumSize(450, 600)
-        self.setWindowIcon(QIcon(resource_path("assets/icon/logo.ico")))
         self.setWindowFlag(Qt.WindowType.FramelessWindowHint)
         # Прозрачность по краям окна — углы и 4px внешний отступ становятся
         # полностью прозрачными, создавая эффект «парящего» окна без жёстких
@@ -1822,7 +1821,7 @@ class MainWindow(QMainWindow):
         except Exception:
             pass
         self.audio.stop()
-        self.net.running = False
+        self.net.shutdown()
         from PyQt6.QtWidgets import QApplication
         QApplication.quit()
         e.accept()
@@ -566,7 +566,6 @@ class VideoWindow(QWidget):
     # ------------------------------------------------------------------
     def _setup_ui(self, nick: str):
         self.setWindowTitle(f"Стрим: {nick}")
-        self.setWindowIcon(QIcon(resource_path("assets/icon/logo.ico")))
         self.resize(1280, 720)
         self.setMinimumSize(640, 360)
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
@@ -8,9 +8,10 @@ from PyQt6.QtCore import QObject, pyqtSignal
 from PyQt6.QtGui import QImage
 from config import (
     VIDEO_WIDTH, VIDEO_HEIGHT, VIDEO_FPS, VIDEO_BITRATE,
-    MAX_VIDEO_PAYLOAD, VIDEO_CHUNK_HEADER, VIDEO_CHUNK_STRUCT,
+    VIDEO_CHUNK_UNPACK_FROM,
     VIDEO_HEADER_SIZE, FLAG_VIDEO,
 )
+from net_utils import set_thread_affinity
 from fractions import Fraction
 
 
@@ -395,6 +396,7 @@ class VideoEngine(QObject):
     # Кодирование и фрагментация
     # ------------------------------------------------------------------
     def _encode_loop(self):
+        set_thread_affinity("enc")
         width   = self.current_settings.get('width',  1280)
         height  = self.current_settings.get('height', 720)
         fps     = self.current_settings.get('fps',    30)
@@ -489,16 +491,20 @@ class VideoEngine(QObject):
             return
 
         self.frame_counter = (self.frame_counter + 1) % 0xFFFFFFFF
+        frame_id     = self.frame_counter
         total_len    = len(data)
-        chunks_count = (total_len + MAX_VIDEO_PAYLOAD - 1) // MAX_VIDEO_PAYLOAD
+        # Размер чанка выбран при подключении (NetParams, _apply_path_mtu)
+        max_payload  = self.net.net_params.max_payload
+        chunks_count = (total_len + max_payload - 1) // max_payload
+        # memoryview: срезы чанков без копирования — байты копируются один раз,
+        # прямо в слот пакета внутри send_video_chunk (заголовки — pack_into).
+        view         = memoryview(data)
+        send_chunk   = self.net.send_video_chunk
 
         for i in range(chunks_count):
-            start         = i * MAX_VIDEO_PAYLOAD
-            end           = min(start + MAX_VIDEO_PAYLOAD, total_len)
-            chunk_payload = data[start:end]
-            v_header      = VIDEO_CHUNK_HEADER.pack(self.frame_counter, i, chunks_count)
+            start = i * max_payload
             try:
-                self.net.send_video_packet(v_header + chunk_payload)
+                send_chunk(frame_id, i, chunks_count, view[start:start + max_payload])
             except Exception:
                 pass
 
@@ -525,8 +531,10 @@ class VideoEngine(QObject):
             return
 
         try:
-            frame_id, chunk_idx, total_chunks = VIDEO_CHUNK_HEADER.unpack(data[:VIDEO_HEADER_SIZE])
-            payload = data[VIDEO_HEADER_SIZE:]
+            frame_id, chunk_idx, total_chunks = VIDEO_CHUNK_UNPACK_FROM(data)
+            # data может быть memoryview на буфер приёма — payload хранится
+            # до сборки кадра, поэтому копируем (ровно один раз на чанк)
+            payload = bytes(data[VIDEO_HEADER_SIZE:])
 
             # Переменные для передачи данных за пределы лока
             assembled_chunks = None